@@ -1,155 +1,1752 @@
 # dashboard_france_tv_all_channels.py
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
+# graph_objects charge ses classes à la demande ; pandas n'est importé que par la relecture
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import time
 from datetime import datetime, timedelta
-import random
+import argparse
+import asyncio
+import threading
+import functools
+import json
+import os
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from types import MappingProxyType
+from abc import ABC, abstractmethod
 import warnings
 warnings.filterwarnings('ignore')
 
 # Configuration de la page
 st.set_page_config(
     page_title="France Télévisions - Toutes Chaînes Live",
-    page_icon="📺",
+    page_icon=":material/live_tv:",  # Une icône emoji chargerait la table des emojis (~40 ms au premier rendu)
     layout="wide",
     initial_sidebar_state="expanded"
 )
 
+# Ressources statiques livrées avec le dashboard
+ASSETS_DIR = Path(__file__).parent / 'assets'
+DATA_DIR = Path(__file__).parent / 'data'
+LOGO_PATH = ASSETS_DIR / 'france_televisions_logo.svg'
+CSS_PATH = ASSETS_DIR / 'style.css'
+CATALOG_PATH = DATA_DIR / 'catalog.json'
+
+def freeze(value):
+    """Copie en lecture seule d'une structure JSON : dicts en mappings figés, listes en tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+@functools.lru_cache(maxsize=None)
+def load_catalog():
+    """Catalogues chaînes, programmes, régions et plateformes, chargés une fois par processus"""
+    with open(CATALOG_PATH, encoding='utf-8') as f:
+        return freeze(json.load(f))
+
+@st.cache_resource
+def load_logo():
+    """Logo local, lu une seule fois : aucun accès réseau au premier affichage"""
+    return LOGO_PATH.read_text(encoding='utf-8')
+
+@st.cache_resource
+def load_css():
+    """Bloc <style> du dashboard, construit une seule fois par processus"""
+    return f"<style>\n{CSS_PATH.read_text(encoding='utf-8')}</style>"
+
 # CSS personnalisé
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        background: linear-gradient(45deg, #0055A4, #FFFFFF, #EF4135);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        margin-bottom: 1rem;
-        font-weight: bold;
-    }
-    .live-badge {
-        background: linear-gradient(45deg, #0055A4, #EF4135);
-        color: white;
-        padding: 0.3rem 1rem;
-        border-radius: 20px;
-        font-weight: bold;
-        display: inline-block;
-        animation: pulse 1.5s infinite;
-    }
-    @keyframes pulse {
-        0% { transform: scale(1); opacity: 1; }
-        50% { transform: scale(1.05); opacity: 0.8; }
-        100% { transform: scale(1); opacity: 1; }
-    }
-    .channel-card {
-        background: rgba(0, 85, 164, 0.08);
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #0055A4;
-        margin: 0.5rem 0;
-        transition: transform 0.2s;
-    }
-    .channel-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-    .positive { color: #00C851; font-weight: bold; }
-    .negative { color: #ff4444; font-weight: bold; }
-    .neutral { color: #ffbb33; font-weight: bold; }
-    .metric-large {
-        font-size: 1.4rem;
-        font-weight: bold;
-        color: #0055A4;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# Fond de carte des régions : GeoJSON livré (métropole, Corse, encarts outre-mer)
+REGIONS_PATH = DATA_DIR / 'regions.geojson'
+# Servi en statique par Streamlit si server.enableStaticServing est actif (.streamlit/config.toml)
+STATIC_DIR = Path(__file__).parent / 'static'
+# Tolérances de simplification en degrés ; on retient la plus grossière sous la taille d'un pixel
+GEO_TOLERANCES = (0.0, 0.02, 0.05, 0.12)
+# Étendue en latitude de la carte (Corse et encarts compris) et hauteur d'affichage
+GEO_LAT_SPAN = 10.0
+GEO_MAP_HEIGHT = 500
+
+def douglas_peucker(points, tolerance):
+    """Masque des sommets conservés d'une polyligne (n, 2), extrémités comprises"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        origin, direction = points[start], points[end] - points[start]
+        offsets = points[start + 1:end] - origin
+        norm = np.hypot(*direction)
+        if norm:
+            distances = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]) / norm
+        else:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack += [(start, split), (split, end)]
+    return keep
+
+def _ring_junctions(rings):
+    """Sommets où un anneau passe d'une frontière partagée à une autre (ou au littoral)"""
+    owners = {}
+    for index, ring in enumerate(rings):
+        for a, b in zip(ring, ring[1:] + ring[:1]):
+            owners.setdefault(frozenset((a, b)), set()).add(index)
+    junctions = set()
+    for ring in rings:
+        for previous, vertex, following in zip(ring[-1:] + ring[:-1], ring, ring[1:] + ring[:1]):
+            if owners[frozenset((previous, vertex))] != owners[frozenset((vertex, following))]:
+                junctions.add(vertex)
+    return junctions
+
+def simplify_rings(rings, tolerance):
+    """Simplifie des anneaux (listes de sommets, non refermés) sans ouvrir les frontières communes
+    
+    Chaque anneau est découpé en arcs entre jonctions ; un arc partagé par deux régions
+    est simplifié une seule fois, dans une orientation canonique, puis réutilisé tel quel.
+    """
+    junctions = _ring_junctions(rings)
+    arcs = {}
+    simplified = []
+    for ring in rings:
+        cuts = [i for i, vertex in enumerate(ring) if vertex in junctions]
+        if not cuts:
+            # Île : coupée en son premier sommet et le sommet le plus éloigné
+            points = np.array(ring)
+            cuts = [0, int(np.argmax(np.hypot(*(points - points[0]).T)))]
+        start = cuts[0]
+        ring = ring[start:] + ring[:start]
+        cuts = [cut - start for cut in cuts] + [len(ring)]
+        closed = ring + ring[:1]
+        result = []
+        for begin, end in zip(cuts, cuts[1:]):
+            arc = tuple(closed[begin:end + 1])
+            canonical = min(arc, arc[::-1])
+            if canonical not in arcs:
+                keep = douglas_peucker(np.array(canonical), tolerance)
+                arcs[canonical] = tuple(vertex for vertex, kept in zip(canonical, keep) if kept)
+            kept = arcs[canonical] if canonical == arc else arcs[canonical][::-1]
+            result.extend(kept[:-1])
+        simplified.append(result if len(result) >= 3 else ring)
+    return simplified
+
+def _signed_area(ring):
+    points = np.asarray(ring, dtype=np.float64)
+    x, y = points[:, 0], points[:, 1]
+    return (np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+
+@functools.lru_cache(maxsize=None)
+def load_region_features():
+    """Régions du GeoJSON livré : nom et polygones (anneaux de sommets), lus une fois par processus"""
+    with open(REGIONS_PATH, encoding='utf-8') as f:
+        collection = json.load(f)
+    features = []
+    for feature in collection['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        features.append((
+            feature['properties']['nom'],
+            tuple(tuple([tuple(vertex) for vertex in ring[:-1]] for ring in polygon) for polygon in polygons)
+        ))
+    return tuple(features)
+
+@functools.lru_cache(maxsize=None)
+def region_geojson(tolerance):
+    """GeoJSON des régions simplifié à `tolerance` degrés, calculé une fois par processus
+    
+    Les anneaux extérieurs sont remis dans le sens horaire attendu par le rendu
+    géographique de Plotly (d3-geo), quel que soit le sens du fichier source.
+    """
+    features = load_region_features()
+    rings = [ring for _, polygons in features for polygon in polygons for ring in polygon]
+    simplified = iter(simplify_rings(rings, tolerance) if tolerance else rings)
+    decimals = 3 if not tolerance else max(2, int(np.ceil(-np.log10(tolerance / 4))))
+    
+    geojson = {'type': 'FeatureCollection', 'features': []}
+    for name, polygons in features:
+        coordinates = []
+        for polygon in polygons:
+            shape = []
+            for depth, _ in enumerate(polygon):
+                ring = next(simplified)
+                exterior = depth == 0
+                if (_signed_area(ring) < 0) != exterior:
+                    ring = ring[::-1]
+                shape.append([[round(x, decimals), round(y, decimals)] for x, y in ring + ring[:1]])
+            coordinates.append(shape)
+        geojson['features'].append({
+            'type': 'Feature', 'properties': {'nom': name},
+            'geometry': {'type': 'MultiPolygon', 'coordinates': coordinates}
+        })
+    return geojson
+
+def geo_tolerance(height=GEO_MAP_HEIGHT):
+    """Tolérance de simplification adaptée à une carte de `height` pixels de haut"""
+    degrees_per_pixel = GEO_LAT_SPAN / height
+    return max(tolerance for tolerance in GEO_TOLERANCES if tolerance <= degrees_per_pixel)
+
+@functools.lru_cache(maxsize=None)
+def region_geojson_source(tolerance):
+    """Géométries à placer dans la figure : URL statique si possible, sinon le GeoJSON lui-même
+    
+    Avec le service statique de Streamlit, le navigateur télécharge le fond de carte une
+    fois et le garde en cache : chaque rafraîchissement ne transporte que les valeurs.
+    """
+    geojson = region_geojson(tolerance)
+    if not st.get_option('server.enableStaticServing'):
+        return geojson
+    path = STATIC_DIR / f'regions-{tolerance:g}.geojson'
+    try:
+        STATIC_DIR.mkdir(exist_ok=True)
+        # Nom propre au processus : plusieurs serveurs peuvent écrire le même fond de carte
+        temporary = path.with_name(f'{path.stem}.{os.getpid()}.tmp')
+        temporary.write_text(json.dumps(geojson, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+        os.replace(temporary, path)
+    except OSError:
+        return geojson
+    return f'app/static/{path.name}'
+
+# Rétention de l'historique : jusqu'à 24h à une seconde de résolution
+MAX_HISTORY_POINTS = 24 * 3600
+
+# Niveaux agrégés (secondes par tranche, tranches conservées) : 24h, 7 jours, 30 jours
+ROLLUP_LEVELS = ((10, 8640), (60, 10080), (600, 4320))
+# Un niveau n'est retenu que s'il tient en au plus ce multiple du nombre de points affichés
+ROLLUP_OVERSAMPLING = 4
+
+# Fenêtres proposées sur la courbe d'évolution (libellé -> secondes)
+HISTORY_WINDOWS = {'60 min': 3600, '6 h': 6 * 3600, '24 h': 24 * 3600, '7 jours': 7 * 24 * 3600}
+# Points envoyés par courbe : environ deux par pixel d'un graphique de 600 px
+EVOLUTION_MAX_POINTS = 1200
+
+def minmax_downsample(timestamps, lows, highs, max_points):
+    """Réduit une série à `max_points` points en gardant le minimum et le maximum de chaque groupe"""
+    groups = max(max_points // 2, 1)
+    starts = np.unique(np.linspace(0, len(timestamps), groups, endpoint=False).astype(np.int64))
+    out_timestamps = np.repeat(timestamps[starts], 2)
+    out_values = np.empty(2 * len(starts), dtype=np.float64)
+    out_values[0::2] = np.minimum.reduceat(lows, starts)
+    out_values[1::2] = np.maximum.reduceat(highs, starts)
+    return out_timestamps, out_values
+
+class RollupLevel:
+    """Agrégats min/max/moyenne par tranche de `seconds`, tenus à jour à chaque ajout
+    
+    Même stockage en miroir que HistoryRing ; la dernière tranche, encore ouverte, est
+    mise à jour en place tant que les points tombent dans la même tranche.
+    """
+    def __init__(self, key_count, seconds, capacity, slack=256, allocate=np.zeros):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.size = capacity + slack
+        self.mins = allocate((key_count, 2 * self.size), np.int64)
+        self.maxs = allocate((key_count, 2 * self.size), np.int64)
+        self.sums = allocate((key_count, 2 * self.size), np.float64)
+        self.counts = allocate(2 * self.size, np.int64)
+        self.starts = allocate(2 * self.size, 'datetime64[s]')
+        self.head = 0
+        self.length = 0
+        self.bucket = None
+    
+    def append(self, second, row):
+        """Intègre un point horodaté (secondes epoch) à la tranche ouverte ou à une nouvelle"""
+        bucket = second // self.seconds
+        if bucket == self.bucket:
+            position = (self.head - 1) % self.size
+            for pos in (position, position + self.size):
+                np.minimum(self.mins[:, pos], row, out=self.mins[:, pos])
+                np.maximum(self.maxs[:, pos], row, out=self.maxs[:, pos])
+                self.sums[:, pos] += row
+                self.counts[pos] += 1
+            return
+        
+        head = self.head
+        for pos in (head, head + self.size):
+            self.mins[:, pos] = row
+            self.maxs[:, pos] = row
+            self.sums[:, pos] = row
+            self.counts[pos] = 1
+            self.starts[pos] = bucket * self.seconds
+        self.head = (head + 1) % self.size
+        self.length = min(self.capacity, self.length + 1)
+        self.bucket = bucket
+    
+    def extend(self, seconds, rows):
+        """Intègre un bloc de points triés en une passe vectorisée (reduceat par tranche)"""
+        buckets = seconds // self.seconds
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        # Les tranches qui sortiraient aussitôt de la fenêtre ne sont pas calculées
+        if len(starts) > self.capacity:
+            starts = starts[-self.capacity:]
+            buckets, rows = buckets[starts[0]:], rows[:, starts[0]:]
+            starts = starts - starts[0]
+        mins = np.minimum.reduceat(rows, starts, axis=1)
+        maxs = np.maximum.reduceat(rows, starts, axis=1)
+        sums = np.add.reduceat(rows, starts, axis=1).astype(np.float64)
+        counts = np.diff(np.append(starts, len(buckets)))
+        bucket_ids = buckets[starts]
+        
+        # La première tranche du bloc peut prolonger la tranche ouverte
+        if bucket_ids[0] == self.bucket:
+            position = (self.head - 1) % self.size
+            for pos in (position, position + self.size):
+                np.minimum(self.mins[:, pos], mins[:, 0], out=self.mins[:, pos])
+                np.maximum(self.maxs[:, pos], maxs[:, 0], out=self.maxs[:, pos])
+                self.sums[:, pos] += sums[:, 0]
+                self.counts[pos] += counts[0]
+            mins, maxs, sums, counts, bucket_ids = mins[:, 1:], maxs[:, 1:], sums[:, 1:], counts[1:], bucket_ids[1:]
+        if not len(bucket_ids):
+            return
+        
+        mins, maxs, sums = mins[:, -self.capacity:], maxs[:, -self.capacity:], sums[:, -self.capacity:]
+        counts, bucket_ids = counts[-self.capacity:], bucket_ids[-self.capacity:]
+        positions = (self.head + np.arange(len(bucket_ids))) % self.size
+        for offset in (0, self.size):
+            self.mins[:, positions + offset] = mins
+            self.maxs[:, positions + offset] = maxs
+            self.sums[:, positions + offset] = sums
+            self.counts[positions + offset] = counts
+            self.starts[positions + offset] = (bucket_ids * self.seconds).astype('datetime64[s]')
+        self.head = (self.head + len(bucket_ids)) % self.size
+        self.length = min(self.capacity, self.length + len(bucket_ids))
+        self.bucket = bucket_ids[-1]
+    
+    def window(self, head, length, row):
+        """Horodatages, minimums, maximums et moyennes de la clé `row`, figés à (head, length)"""
+        end = head + self.size
+        start = end - length
+        return (self.starts[start:end], self.mins[row, start:end], self.maxs[row, start:end],
+                self.sums[row, start:end] / self.counts[start:end])
+    
+    def state(self):
+        """Tranches conservées, de la plus ancienne à la plus récente, et numéro de la tranche ouverte"""
+        window = slice(self.head + self.size - self.length, self.head + self.size)
+        return {'mins': self.mins[:, window], 'maxs': self.maxs[:, window], 'sums': self.sums[:, window],
+                'counts': self.counts[window], 'starts': self.starts[window],
+                'bucket': -1 if self.bucket is None else self.bucket}
+    
+    def load_state(self, state):
+        """Reprend les tranches d'un state(), rangées à partir de la position 0"""
+        length = len(state['counts'])
+        for offset in (0, self.size):
+            window = slice(offset, offset + length)
+            self.mins[:, window] = state['mins']
+            self.maxs[:, window] = state['maxs']
+            self.sums[:, window] = state['sums']
+            self.counts[window] = state['counts']
+            self.starts[window] = state['starts']
+        self.head = length % self.size
+        self.length = length
+        bucket = int(state['bucket'])
+        self.bucket = None if bucket < 0 else bucket
+
+class HistoryWindow:
+    """Vue figée d'un HistoryRing, telle qu'au moment de l'instantané"""
+    def __init__(self, ring, head, length, rollups=()):
+        self._ring = ring
+        self._head = head
+        self._length = length
+        self._rollups = rollups
+    
+    def __len__(self):
+        return self._length
+    
+    def __iter__(self):
+        return iter(('timestamp',) + self._ring.keys)
+    
+    def __contains__(self, key):
+        return key == 'timestamp' or key in self._ring.index
+    
+    def __getitem__(self, key):
+        end = self._head + self._ring.size
+        start = end - self._length
+        if key == 'timestamp':
+            return self._ring.timestamps[start:end]
+        return self._ring.values[self._ring.index[key], start:end]
+    
+    def downsampled(self, key, seconds, max_points=EVOLUTION_MAX_POINTS):
+        """Série de `key` sur les `seconds` dernières secondes, en au plus `max_points` points
+        
+        Les points bruts sont renvoyés tels quels s'ils tiennent ; sinon on prend le niveau
+        le plus fin dont la fenêtre tient en ROLLUP_OVERSAMPLING * max_points tranches,
+        puis on réduit par min/max. La taille envoyée reste bornée quelle que soit la fenêtre.
+        """
+        timestamps = self['timestamp']
+        if not len(timestamps):
+            return timestamps, self[key]
+        start = timestamps[-1] - np.timedelta64(seconds, 's')
+        first = np.searchsorted(timestamps, start, side='left')
+        raw_timestamps, raw_values = timestamps[first:], self[key][first:]
+        if len(raw_timestamps) <= max_points:
+            return raw_timestamps, raw_values
+        if len(raw_timestamps) <= ROLLUP_OVERSAMPLING * max_points or not self._rollups:
+            return minmax_downsample(raw_timestamps, raw_values, raw_values, max_points)
+        
+        row = self._ring.index[key]
+        for i, (level, head, length) in enumerate(self._rollups):
+            coarsest = i == len(self._rollups) - 1
+            fits = seconds / level.seconds <= ROLLUP_OVERSAMPLING * max_points
+            covers = level.capacity * level.seconds >= seconds
+            if coarsest or (fits and covers):
+                starts, mins, maxs, means = level.window(head, length, row)
+                first = np.searchsorted(starts, start.astype('datetime64[s]'), side='left')
+                starts, mins, maxs, means = starts[first:], mins[first:], maxs[first:], means[first:]
+                if len(starts) <= max_points:
+                    return starts, means
+                return minmax_downsample(starts, mins, maxs, max_points)
+
+class HistoryRing:
+    """Historique en colonnes sur tampons circulaires NumPy préalloués
+    
+    Chaque point est écrit deux fois (position et position + taille) : les N derniers
+    points forment toujours une tranche contiguë, lue comme une vue sans copie. La
+    marge `slack` garantit qu'une vue figée reste valable pendant `slack` ajouts.
+    `allocate(shape, dtype)` fournit les tableaux, par défaut en mémoire privée.
+    """
+    def __init__(self, keys, capacity=MAX_HISTORY_POINTS, slack=256, rollup_levels=ROLLUP_LEVELS,
+                 allocate=np.zeros):
+        if not 0 < capacity <= MAX_HISTORY_POINTS:
+            raise ValueError(f"capacity doit être comprise entre 1 et {MAX_HISTORY_POINTS}")
+        self.keys = tuple(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.capacity = capacity
+        self.size = capacity + slack
+        self.values = allocate((len(self.keys), 2 * self.size), np.int64)
+        self.timestamps = allocate(2 * self.size, 'datetime64[ms]')
+        self.rollups = [RollupLevel(len(self.keys), seconds, buckets, allocate=allocate)
+                        for seconds, buckets in rollup_levels]
+        self.head = 0
+        self.length = 0
+    
+    def append(self, timestamp, row):
+        """Ajoute un point (une valeur par clé, dans l'ordre de `keys`) en O(1)"""
+        second = np.datetime64(timestamp, 's').astype(np.int64)
+        for level in self.rollups:
+            level.append(second, row)
+        
+        head = self.head
+        self.values[:, head] = row
+        self.values[:, head + self.size] = row
+        self.timestamps[head] = timestamp
+        self.timestamps[head + self.size] = timestamp
+        self.head = (head + 1) % self.size
+        if self.length < self.capacity:
+            self.length += 1
+    
+    def extend(self, timestamps, rows, rollups=True):
+        """Ajoute un bloc de points d'un coup (`rows` de forme (clés, points))
+        
+        Seuls les `capacity` derniers points bruts sont conservés ; les niveaux agrégés
+        reçoivent tout le bloc, sauf avec `rollups=False` (niveaux repris d'un point de
+        reprise). Un bloc plus long que `slack` invalide les vues figées en cours : à
+        réserver au remplissage initial.
+        """
+        timestamps = np.asarray(timestamps, dtype='datetime64[ms]')
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(timestamps):
+            return
+        if rollups:
+            self.extend_rollups(timestamps, rows)
+        
+        timestamps, rows = timestamps[-self.capacity:], rows[:, -self.capacity:]
+        count = len(timestamps)
+        positions = (self.head + np.arange(count)) % self.size
+        self.values[:, positions] = rows
+        self.values[:, positions + self.size] = rows
+        self.timestamps[positions] = timestamps
+        self.timestamps[positions + self.size] = timestamps
+        self.head = (self.head + count) % self.size
+        self.length = min(self.capacity, self.length + count)
+    
+    def extend_rollups(self, timestamps, rows):
+        """Intègre un bloc trié aux seuls niveaux agrégés"""
+        if not len(timestamps):
+            return
+        seconds = np.asarray(timestamps, dtype='datetime64[ms]').astype('datetime64[s]').astype(np.int64)
+        for level in self.rollups:
+            level.extend(seconds, np.asarray(rows, dtype=np.int64))
+    
+    def clear(self):
+        """Vide l'historique et ses niveaux agrégés, sans réallouer"""
+        self.head = self.length = 0
+        for level in self.rollups:
+            level.head = level.length = 0
+            level.bucket = None
+    
+    def freeze(self):
+        """Retourne une vue figée de l'historique courant, sans copie"""
+        return HistoryWindow(self, self.head, self.length,
+                             [(level, level.head, level.length) for level in self.rollups])
+    
+    def __len__(self):
+        return self.length
+    
+    def __iter__(self):
+        return iter(('timestamp',) + self.keys)
+    
+    def __contains__(self, key):
+        return key == 'timestamp' or key in self.index
+    
+    def __getitem__(self, key):
+        return self.freeze()[key]
+
+# Codes de tendance du moteur vectorisé et leur libellé
+TREND_STABLE, TREND_UP, TREND_DOWN = 0, 1, -1
+TREND_LABELS = {TREND_STABLE: 'stable', TREND_UP: 'up', TREND_DOWN: 'down'}
+# Icône et classe CSS de chaque tendance, pour l'affichage
+TREND_DISPLAY = {TREND_STABLE: ("➡️", "neutral"), TREND_UP: ("📈", "positive"), TREND_DOWN: ("📉", "negative")}
+
+def volatility_for_hour(hour):
+    """Volatilité de l'audience selon la tranche horaire"""
+    if hour in [8, 13, 20]:  # Pic des journaux
+        return 0.07
+    elif 20 <= hour <= 23:  # Prime time
+        return 0.05
+    elif 0 <= hour <= 6:  # Nuit
+        return 0.12
+    else:  # Journée normale
+        return 0.04
+
+# Volatilité par heure, pour les calculs vectorisés sur des séries horodatées
+VOLATILITY_BY_HOUR = np.array([volatility_for_hour(hour) for hour in range(24)])
+
+# Niveau d'audience relatif par heure : nuit creuse, pics des journaux à 8h/13h/20h, prime time
+DAYPART_AUDIENCE = np.array([
+    0.45, 0.30, 0.22, 0.18, 0.18, 0.22, 0.35, 0.60,  # 0h - 7h
+    0.85, 0.60, 0.50, 0.55, 0.80, 1.05, 0.80, 0.65,  # 8h - 15h
+    0.65, 0.70, 0.85, 1.10, 1.60, 1.45, 1.25, 0.80   # 16h - 23h
+])
+
+def daypart_profile(timestamps):
+    """Niveau d'audience relatif à chaque horodatage, interpolé d'une heure à l'autre"""
+    minutes = (timestamps.astype('datetime64[m]') - timestamps.astype('datetime64[D]')).astype(np.int64)
+    hours = minutes // 60
+    weight = (minutes % 60) / 60
+    return DAYPART_AUDIENCE[hours] * (1 - weight) + DAYPART_AUDIENCE[(hours + 1) % 24] * weight
+
+def _ar1_filter(noise, phi, block=256):
+    """Filtre AR(1) x[t] = phi * x[t-1] + noise[t] le long du dernier axe, par blocs vectorisés
+    
+    Dans un bloc, x[t] = phi^(t+1) * (état + cumsum(noise / phi^(k+1))) ; les blocs bornent phi^-t pour
+    rester numériquement stable, l'état est reporté d'un bloc au suivant.
+    """
+    out = np.empty_like(noise)
+    powers = phi ** np.arange(1, block + 1)
+    state = np.zeros(noise.shape[:-1])
+    for start in range(0, noise.shape[-1], block):
+        chunk = noise[..., start:start + block]
+        decay = powers[:chunk.shape[-1]]
+        out[..., start:start + block] = decay * (state[..., None] + np.cumsum(chunk / decay, axis=-1))
+        state = out[..., start + chunk.shape[-1] - 1]
+    return out
+
+def generate_backfill(viewers, end, points, interval=timedelta(minutes=1),
+                      digital_traffic=12500000, rng=None, phi=0.95):
+    """Génère un historique synthétique de `points` mesures se terminant à `end`
+    
+    Les courbes suivent le profil horaire DAYPART_AUDIENCE, calé pour retomber sur
+    l'audience actuelle `viewers`, avec un bruit corrélé dans le temps dont l'amplitude
+    suit la volatilité de la tranche horaire. Retourne (horodatages, lignes) où `rows`
+    a une ligne par chaîne puis 'total' et 'digital', comme HistoryRing.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    viewers = np.asarray(viewers, dtype=np.float64)
+    step = np.timedelta64(int(interval.total_seconds() * 1000), 'ms')
+    end = np.datetime64(end, 'ms')
+    timestamps = end - step * np.arange(points, 0, -1)
+    
+    profile = daypart_profile(timestamps)
+    current_level = daypart_profile(np.array([end]))[0]
+    hours = (timestamps.astype('datetime64[h]') - timestamps.astype('datetime64[D]')).astype(np.int64)
+    
+    # Bruit log-normal corrélé, d'écart-type stationnaire égal à la volatilité horaire
+    sigma = VOLATILITY_BY_HOUR[hours] * np.sqrt(1 - phi ** 2)
+    noise = _ar1_filter(rng.standard_normal((len(viewers) + 1, points)) * sigma, phi)
+    
+    rows = np.empty((len(viewers) + 2, points), dtype=np.int64)
+    channel_curves = viewers[:, None] * (profile / current_level) * np.exp(noise[:-1])
+    rows[:-2] = np.maximum(channel_curves, viewers[:, None] * 0.3)
+    
+    # Même construction que update_live_data : total = chaînes + hors grille, digital plancher 8M
+    rows[-2] = rows[:-2].sum(axis=0) + rng.integers(500000, 800000, size=points, endpoint=True)
+    rows[-1] = np.maximum(digital_traffic * np.exp(noise[-1] * 2), 8000000)
+    return timestamps, rows
+
+def build_regional_grid():
+    """Déclinaisons régionales France 3, stations La 1ère et chaînes FAST"""
+    grid = {}
+    
+    france3_regions = [
+        'Alpes', 'Alsace', 'Aquitaine', 'Auvergne', 'Bourgogne', 'Bretagne',
+        'Centre-Val de Loire', 'Champagne-Ardenne', 'Corse ViaStella', 'Côte d\'Azur',
+        'Franche-Comté', 'Languedoc-Roussillon', 'Limousin', 'Lorraine', 'Midi-Pyrénées',
+        'Nord-Pas-de-Calais', 'Normandie Caen', 'Normandie Rouen', 'Paris Île-de-France',
+        'Pays de la Loire', 'Picardie', 'Poitou-Charentes', 'Provence-Alpes', 'Rhône-Alpes'
+    ]
+    for region in france3_regions:
+        grid[f'France 3 {region}'] = {
+            'viewers': 75000, 'share': 0.4, 'program': 'Information locale', 'trend': 'stable',
+            'change': '+0.0%', 'category': 'Régionale', 'color': '#EF4135', 'peak_today': 140000
+        }
+    
+    la1ere_stations = [
+        'Guadeloupe', 'Martinique', 'Guyane', 'La Réunion', 'Mayotte',
+        'Nouvelle-Calédonie', 'Polynésie', 'Wallis et Futuna', 'Saint-Pierre et Miquelon'
+    ]
+    for station in la1ere_stations:
+        grid[f'{station} La 1ère'] = {
+            'viewers': 40000, 'share': 0.2, 'program': 'Journal local', 'trend': 'stable',
+            'change': '+0.0%', 'category': 'Outre-Mer', 'color': '#FFD700', 'peak_today': 90000
+        }
+    
+    fast_channels = ['Okoo', 'France.tv Slash', 'France.tv Sport', 'France.tv Docs']
+    for channel in fast_channels:
+        grid[channel] = {
+            'viewers': 25000, 'share': 0.1, 'program': 'Programmation continue', 'trend': 'stable',
+            'change': '+0.0%', 'category': 'FAST', 'color': '#00A8E8', 'peak_today': 50000
+        }
+    
+    return grid
+
+class ChannelEngine:
+    """Moteur de simulation vectorisé : fait avancer toutes les chaînes en une passe NumPy"""
+    def __init__(self, names, viewers, change_pct=None, trend=None, rng=None):
+        self.names = tuple(names)
+        self.viewers = np.asarray(viewers, dtype=np.int64)
+        count = len(self.names)
+        self.change_pct = np.zeros(count) if change_pct is None else np.asarray(change_pct, dtype=np.float64)
+        self.trend = np.zeros(count, dtype=np.int8) if trend is None else np.asarray(trend, dtype=np.int8)
+        self.rng = rng if rng is not None else np.random.default_rng()
+    
+    def step(self, volatility, uniforms=None):
+        """Avance toutes les chaînes d'un pas et retourne l'audience cumulée
+        
+        `uniforms` : un tirage [0, 1) par chaîne, venu de ses propres flux (mode
+        déterministe) ; sinon les variations sont tirées de `rng`.
+        """
+        current = self.viewers
+        bound = (current * volatility).astype(np.int64)
+        if uniforms is None:
+            change = self.rng.integers(-bound, bound, endpoint=True)
+        else:
+            change = np.floor(uniforms * (2 * bound + 1)).astype(np.int64) - bound
+        
+        # Plancher à 30% de l'audience courante
+        new_viewers = np.maximum(current + change, (current * 0.3).astype(np.int64))
+        
+        # Tendance : stable sous 0.5% de variation
+        ratio = change / np.maximum(current, 1)
+        self.trend = np.where(np.abs(ratio) < 0.005, TREND_STABLE, np.sign(change)).astype(np.int8)
+        self.change_pct = ratio * 100
+        
+        self.viewers = new_viewers
+        return int(new_viewers.sum())
+    
+    def apply(self, new_viewers):
+        """Applique des audiences mesurées et en déduit variation et tendance"""
+        new_viewers = np.asarray(new_viewers, dtype=np.int64)
+        change = new_viewers - self.viewers
+        ratio = change / np.maximum(self.viewers, 1)
+        self.trend = np.where(np.abs(ratio) < 0.005, TREND_STABLE, np.sign(change)).astype(np.int8)
+        self.change_pct = ratio * 100
+        
+        self.viewers = new_viewers
+        return int(new_viewers.sum())
+
+# Mode déterministe : flux NumPy dérivés d'une graine par SeedSequence(graine, spawn_key=(flux, ...))
+STREAM_GROUP, STREAM_CHANNEL, STREAM_MODEL = range(3)
+# Pas tirés d'avance pour chaque chaîne, pour garder un pas vectorisé
+SIMULATION_BLOCK = 256
+# Début de l'horloge simulée par défaut : un lundi soir, avant le journal de 20h
+SIMULATION_START = datetime(2025, 1, 6, 19, 0)
+
+class SimulationStreams:
+    """Flux aléatoires indépendants dérivés d'une seule graine : un par chaîne, un pour le groupe
+    
+    Le flux de la chaîne i ne dépend que de (graine, i) : des chaînes simulées dans un
+    autre thread ou processus tirent exactement les mêmes nombres que dans une simulation
+    complète. Chaque pas consomme un nombre fixe de tirages par chaîne (marche aléatoire,
+    rotation du programme, choix du programme), qu'ils servent ou non, pour que les flux
+    restent alignés ; ils sont tirés par blocs de `block` pas.
+    """
+    DRAWS = 3
+    
+    def __init__(self, seed, indices, block=SIMULATION_BLOCK):
+        self.seed = seed
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.group = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(STREAM_GROUP,)))
+        self.channels = [np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(STREAM_CHANNEL, i)))
+                         for i in self.indices.tolist()]
+        self.block = block
+        self._draws = np.empty((len(self.channels), block, self.DRAWS))
+        self._cursor = block
+    
+    def channel_draws(self):
+        """Tirages uniformes [0, 1) du pas courant, une ligne de DRAWS valeurs par chaîne"""
+        if self._cursor == self.block:
+            for rng, out in zip(self.channels, self._draws):
+                rng.random(out=out)
+            self._cursor = 0
+        draws = self._draws[:, self._cursor]
+        self._cursor += 1
+        return draws
+
+class SimulationClock:
+    """Horloge simulée du mode déterministe : avance d'un intervalle fixe par pas"""
+    def __init__(self, start=SIMULATION_START, interval=timedelta(seconds=5)):
+        self.now = start
+        self.interval = interval
+    
+    def advance(self):
+        self.now += self.interval
+        return self.now
+
+def simulate_channels(seed, viewers, volatility, indices=None):
+    """Audiences des chaînes `indices` (toutes par défaut) après chaque pas de volatilité `volatility`
+    
+    Même marche aléatoire que RandomWalkSource en mode déterministe ; retourne un
+    tableau (chaînes, pas). Le résultat d'une chaîne ne dépend que de la graine, de son
+    indice et de son audience initiale.
+    """
+    indices = np.arange(len(viewers)) if indices is None else np.asarray(indices, dtype=np.int64)
+    streams = SimulationStreams(seed, indices)
+    engine = ChannelEngine(indices.tolist(), np.asarray(viewers, dtype=np.int64)[indices])
+    out = np.empty((len(indices), len(volatility)), dtype=np.int64)
+    for t, level in enumerate(np.asarray(volatility, dtype=np.float64).tolist()):
+        engine.step(level, streams.channel_draws()[:, 0])
+        out[:, t] = engine.viewers
+    return out
+
+def simulate_sharded(seed, viewers, volatility, shards, executor=None):
+    """simulate_channels découpé en `shards` groupes de chaînes contigus, simulés dans `executor`
+    
+    ThreadPoolExecutor par défaut ; un ProcessPoolExecutor répartit sur plusieurs
+    processus. Le résultat est identique bit à bit à une simulation en un seul fil.
+    """
+    parts = np.array_split(np.arange(len(viewers)), shards)
+    pool = executor if executor is not None else ThreadPoolExecutor(shards)
+    try:
+        futures = [pool.submit(simulate_channels, seed, viewers, volatility, part) for part in parts]
+        return np.concatenate([future.result() for future in futures])
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+class Vocabulary:
+    """Libellés internés : chaque chaîne de caractères distincte reçoit un code entier stable
+    
+    Les codes ne sont jamais réattribués, si bien qu'un instantané peut partager le
+    vocabulaire vivant sans le copier.
+    """
+    def __init__(self, labels=()):
+        self.labels = []
+        self._codes = {}
+        for label in labels:
+            self.code(label)
+    
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+    
+    def codes(self, labels):
+        return np.array([self.code(label) for label in labels], dtype=np.int16)
+
+class ChannelTable:
+    """Table en colonnes de l'état des chaînes : valeurs numériques et codes catégoriels
+    
+    Aucune chaîne formatée n'y est stockée ; le formatage se fait à l'affichage.
+    Une copie ne coûte que quelques copies de tableaux NumPy.
+    """
+    __slots__ = ('names', 'index', 'viewers', 'peak_today', 'change_pct', 'trend', 'share',
+                 'category', 'program', 'color', 'categories', 'programs', 'colors')
+    
+    def __init__(self, names, index, viewers, peak_today, change_pct, trend, share,
+                 category, program, color, categories, programs, colors):
+        self.names = names
+        self.index = index
+        self.viewers = viewers
+        self.peak_today = peak_today
+        self.change_pct = change_pct
+        self.trend = trend
+        self.share = share
+        self.category = category
+        self.program = program
+        self.color = color
+        self.categories = categories
+        self.programs = programs
+        self.colors = colors
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __contains__(self, name):
+        return name in self.index
+    
+    def record(self, name):
+        """Valeurs d'une chaîne, libellés résolus, sans formatage"""
+        i = self.index[name]
+        return {
+            'viewers': int(self.viewers[i]),
+            'share': float(self.share[i]),
+            'program': self.programs.labels[self.program[i]],
+            'trend': int(self.trend[i]),
+            'change_pct': float(self.change_pct[i]),
+            'category': self.categories.labels[self.category[i]],
+            'color': self.colors.labels[self.color[i]],
+            'peak_today': int(self.peak_today[i])
+        }
+    
+    def color_labels(self):
+        return [self.colors.labels[code] for code in self.color.tolist()]
+
+# Agrégats glissants : (libellé, durée en secondes) ; la fenêtre 'jour' court depuis minuit
+AGGREGATE_WINDOWS = (('5 min', 300), ('1 h', 3600), ('jour', None))
+AGGREGATE_STATS = ('min', 'max', 'mean', 'ewma')
+# Tranches par fenêtre glissante : les bornes de fenêtre sont exactes à 1/60e près
+AGGREGATE_BUCKETS = 60
+AGGREGATE_FIELDS = tuple(f'{stat} {window}' for window, _ in AGGREGATE_WINDOWS for stat in AGGREGATE_STATS) + (
+    'share', 'market_share'
+)
+AGGREGATE_FIELD_INDEX = {field: i for i, field in enumerate(AGGREGATE_FIELDS)}
+
+class RollingWindow:
+    """Min, max et moyenne sur les `seconds` dernières secondes, par tranches de seconds / buckets
+    
+    Chaque tranche garde ses min/max/somme/compte ; une tranche sortie de la fenêtre est
+    vidée (min à +inf, max à -inf) et retirée des totaux courants, si bien que l'agrégat
+    de la fenêtre est une réduction contiguë, sans masque ni copie.
+    """
+    def __init__(self, key_count, seconds, buckets=AGGREGATE_BUCKETS):
+        self.seconds = seconds
+        self.buckets = buckets
+        self.width = seconds / buckets
+        self.ids = np.full(buckets, -1, dtype=np.int64)
+        # Une ligne par tranche : la réduction se fait entre lignes contiguës
+        self.mins = np.full((buckets, key_count), np.inf)
+        self.maxs = np.full((buckets, key_count), -np.inf)
+        self.sums = np.zeros((buckets, key_count))
+        self.counts = np.zeros(buckets, dtype=np.int64)
+        self.total = np.zeros(key_count)
+        self.count = 0
+    
+    # Attributs sauvegardés dans un point de reprise
+    STATE = ('ids', 'mins', 'maxs', 'sums', 'counts', 'total', 'count')
+    
+    def clear(self):
+        self.ids[:] = -1
+        self.mins[:] = np.inf
+        self.maxs[:] = -np.inf
+        self.sums[:] = 0
+        self.counts[:] = 0
+        self.total[:] = 0
+        self.count = 0
+    
+    def _expire(self, bucket):
+        """Vide les tranches sorties de la fenêtre qui se termine à la tranche `bucket`"""
+        stale = np.flatnonzero((self.ids >= 0) & (self.ids <= bucket - self.buckets))
+        if len(stale):
+            self.total -= self.sums[stale].sum(axis=0)
+            self.count -= int(self.counts[stale].sum())
+            self.ids[stale] = -1
+            self.mins[stale] = np.inf
+            self.maxs[stale] = -np.inf
+            self.sums[stale] = 0
+            self.counts[stale] = 0
+    
+    def update(self, second, row):
+        bucket = int(second // self.width)
+        self._expire(bucket)
+        slot = bucket % self.buckets
+        self.ids[slot] = bucket
+        np.minimum(self.mins[slot], row, out=self.mins[slot])
+        np.maximum(self.maxs[slot], row, out=self.maxs[slot])
+        self.sums[slot] += row
+        self.counts[slot] += 1
+        self.total += row
+        self.count += 1
+        return self.reduce()
+    
+    def extend(self, seconds, rows):
+        """Intègre un bloc trié (remplissage initial) : seules les tranches de la fenêtre sont calculées"""
+        buckets = (seconds // self.width).astype(np.int64)
+        self._expire(buckets[-1])
+        first = np.searchsorted(buckets, buckets[-1] - self.buckets + 1)
+        buckets, rows = buckets[first:], rows[:, first:]
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        ids, slots = buckets[starts], buckets[starts] % self.buckets
+        sums = np.add.reduceat(rows, starts, axis=1)
+        counts = np.diff(np.append(starts, len(buckets)))
+        # Une tranche encore valide porte forcément le même numéro : on la prolonge
+        self.ids[slots] = ids
+        self.mins[slots] = np.minimum(self.mins[slots], np.minimum.reduceat(rows, starts, axis=1).T)
+        self.maxs[slots] = np.maximum(self.maxs[slots], np.maximum.reduceat(rows, starts, axis=1).T)
+        self.sums[slots] += sums.T
+        self.counts[slots] += counts
+        self.total += sums.sum(axis=1)
+        self.count += int(counts.sum())
+        return self.reduce()
+    
+    def reduce(self):
+        """(min, max, moyenne) par clé sur la fenêtre courante"""
+        return self.mins.min(axis=0), self.maxs.max(axis=0), self.total / self.count
+
+class AudienceAggregates:
+    """Agrégats par clé (chaînes, total, digital) tenus à jour à chaque pas, lus en O(1)
+    
+    Pour chaque fenêtre : min, max, moyenne et moyenne exponentielle (constante de temps
+    égale à la fenêtre, pondérée par l'intervalle réel entre deux pas). La fenêtre 'jour'
+    et les pics repartent de zéro au premier pas après minuit. S'y ajoutent la part de
+    chaque chaîne dans le total du groupe, sa part de marché estimée et le classement
+    courant des chaînes et des régions.
+    """
+    def __init__(self, keys, channel_count, peaks=None, market_viewers=None, buckets=AGGREGATE_BUCKETS):
+        self.keys = tuple(keys)
+        self.channel_count = channel_count
+        self.market_viewers = market_viewers
+        self.field_index = AGGREGATE_FIELD_INDEX
+        self.values = np.zeros((len(AGGREGATE_FIELDS), len(self.keys)))
+        self.windows = [RollingWindow(len(self.keys), seconds, buckets)
+                        for _, seconds in AGGREGATE_WINDOWS if seconds is not None]
+        self.taus = np.array([seconds or 24 * 3600 for _, seconds in AGGREGATE_WINDOWS], dtype=np.float64)
+        self.order = np.arange(channel_count)
+        self.ranks = np.arange(1, channel_count + 1)
+        self.region_order = np.empty(0, dtype=np.int64)
+        self.region_share = np.empty(0)
+        self.day = None
+        self.day_count = 0
+        self.last_second = None
+        # Pics déjà atteints aujourd'hui avant le démarrage (catalogue), jusqu'à minuit
+        self.seed_peaks = None if peaks is None else np.asarray(peaks, dtype=np.float64)
+    
+    def clear(self):
+        """Oublie tous les pas intégrés (avant de recharger un historique complet)"""
+        for rolling in self.windows:
+            rolling.clear()
+        self.values[:] = 0
+        self.day = None
+        self.day_count = 0
+        self.last_second = None
+    
+    def state(self):
+        """État complet (fenêtres glissantes, jour, moyennes exponentielles), pour un point de reprise"""
+        state = {
+            'values': self.values, 'order': self.order, 'ranks': self.ranks,
+            'day': -1 if self.day is None else self.day.astype(np.int64), 'day_count': self.day_count,
+            'last_second': np.nan if self.last_second is None else self.last_second
+        }
+        for i, rolling in enumerate(self.windows):
+            state.update({f'window{i}_{name}': getattr(rolling, name) for name in RollingWindow.STATE})
+        return state
+    
+    def load_state(self, state):
+        """Reprend un state() : les pas suivants s'intègrent comme s'il n'y avait pas eu d'arrêt"""
+        self.values[:] = state['values']
+        self.order = np.array(state['order'])
+        self.ranks = np.array(state['ranks'])
+        day = int(state['day'])
+        self.day = None if day < 0 else np.datetime64(day, 'D')
+        self.day_count = int(state['day_count'])
+        last_second = float(state['last_second'])
+        self.last_second = None if np.isnan(last_second) else last_second
+        for i, rolling in enumerate(self.windows):
+            for name in RollingWindow.STATE:
+                value = state[f'window{i}_{name}']
+                if np.ndim(value):
+                    getattr(rolling, name)[...] = value
+                else:
+                    setattr(rolling, name, int(value))
+    
+    def _column(self, stat, window):
+        return self.field_index[f'{stat} {window}']
+    
+    def _day_slice(self):
+        """Lignes min, max, moyenne, ewma de la fenêtre 'jour' dans `values`"""
+        start = self._column('min', 'jour')
+        return slice(start, start + len(AGGREGATE_STATS))
+    
+    def update(self, timestamp, row):
+        """Intègre un pas : `row` contient une valeur par clé, dans l'ordre de `keys`"""
+        row = np.asarray(row, dtype=np.float64)
+        second = np.datetime64(timestamp, 'ms').astype(np.int64) / 1000
+        day = np.datetime64(timestamp, 'D')
+        values = self.values
+        
+        for (window, _), rolling in zip(AGGREGATE_WINDOWS, self.windows):
+            column = self._column('min', window)
+            values[column:column + 3] = rolling.update(second, row)
+        
+        # Fenêtre du jour : min/max cumulés et moyenne incrémentale, remis à zéro à minuit
+        day_rows = self._day_slice()
+        if day != self.day:
+            self._reset_day(day, row, seed=self.day is None)
+        else:
+            self.day_count += 1
+            mins, maxs, means = values[day_rows.start:day_rows.start + 3]
+            np.minimum(mins, row, out=mins)
+            np.maximum(maxs, row, out=maxs)
+            means += (row - means) / self.day_count
+        
+        # Moyennes exponentielles : alpha = 1 - exp(-dt / tau), quelle que soit la cadence
+        ewma_rows = [self._column('ewma', window) for window, _ in AGGREGATE_WINDOWS]
+        if self.last_second is None:
+            values[ewma_rows] = row
+        else:
+            alpha = -np.expm1(-max(second - self.last_second, 0.0) / self.taus)
+            values[ewma_rows] += alpha[:, None] * (row - values[ewma_rows])
+        self.last_second = second
+        self._update_shares(row)
+    
+    def extend(self, timestamps, rows):
+        """Intègre un bloc trié d'un coup (historique initial ou relu depuis le journal)"""
+        timestamps = np.asarray(timestamps, dtype='datetime64[ms]')
+        if not len(timestamps):
+            return
+        rows = np.asarray(rows, dtype=np.float64)
+        seconds = timestamps.astype(np.int64) / 1000
+        values = self.values
+        for (window, _), rolling in zip(AGGREGATE_WINDOWS, self.windows):
+            column = self._column('min', window)
+            values[column:column + 3] = rolling.extend(seconds, rows)
+        
+        day = timestamps[-1].astype('datetime64[D]')
+        today = rows[:, timestamps.astype('datetime64[D]') == day]
+        start = self._day_slice().start
+        if day != self.day:
+            self._reset_day(day, today[:, 0], seed=self.day is None and timestamps[0].astype('datetime64[D]') == day)
+            today = today[:, 1:]
+        if today.shape[1]:
+            count = self.day_count + today.shape[1]
+            np.minimum(values[start], today.min(axis=1), out=values[start])
+            np.maximum(values[start + 1], today.max(axis=1), out=values[start + 1])
+            values[start + 2] += (today.sum(axis=1) - today.shape[1] * values[start + 2]) / count
+            self.day_count = count
+        
+        # Forme close de la récurrence : e_n = e_0 exp(-(t_n - t_0) / tau) + somme alpha_i x_i exp(-(t_n - t_i) / tau)
+        origin = seconds[0] if self.last_second is None else self.last_second
+        deltas = np.maximum(np.diff(seconds, prepend=origin), 0.0)
+        for window_index, (window, _) in enumerate(AGGREGATE_WINDOWS):
+            row_index, tau = self._column('ewma', window), self.taus[window_index]
+            alpha = -np.expm1(-deltas / tau)
+            if self.last_second is None:
+                alpha[0] = 1.0
+            decay = np.exp(-(seconds[-1] - seconds) / tau)
+            values[row_index] = values[row_index] * np.exp(-(seconds[-1] - origin) / tau) + rows @ (alpha * decay)
+        self.last_second = seconds[-1]
+        self._update_shares(rows[:, -1])
+    
+    def _reset_day(self, day, row, seed=False):
+        """Nouveau jour : la fenêtre 'jour' repart du pas `row` ; les pics du catalogue ne
+        valent que pour le jour du démarrage"""
+        start = self._day_slice().start
+        self.values[start:start + 3] = row
+        if seed and self.seed_peaks is not None:
+            np.maximum(self.values[start + 1, :self.channel_count], self.seed_peaks,
+                       out=self.values[start + 1, :self.channel_count])
+        self.day = day
+        self.day_count = 1
+    
+    def _update_shares(self, row):
+        """Parts et classement courant des chaînes"""
+        channels = row[:self.channel_count]
+        total = row[self.channel_count]
+        self.values[self.field_index['share'], :self.channel_count] = channels / max(total, 1) * 100
+        self.values[self.field_index['share'], self.channel_count:] = 100
+        if self.market_viewers:
+            self.values[self.field_index['market_share']] = row / self.market_viewers * 100
+        # Tri repris de l'ordre précédent : presque trié d'un pas à l'autre, donc rapide
+        self.order = self.order[np.argsort(-channels[self.order], kind='stable')]
+        self.ranks[self.order] = np.arange(1, len(self.order) + 1)
+    
+    def rank_regions(self, viewers):
+        """Classement et parts des régions, recalculés une fois par pas"""
+        viewers = np.asarray(viewers, dtype=np.float64)
+        self.region_order = np.argsort(-viewers, kind='stable')
+        self.region_share = viewers / max(viewers.sum(), 1) * 100
+    
+    def peak_today(self):
+        """Pics du jour des chaînes (max de la fenêtre 'jour')"""
+        return self.values[self._column('max', 'jour'), :self.channel_count].astype(np.int64)
+    
+    def market_share(self):
+        """Parts de marché courantes des chaînes, en %"""
+        return self.values[self.field_index['market_share'], :self.channel_count].copy()
+    
+    def freeze(self):
+        """Copie figée pour un instantané"""
+        return AggregateView(self.keys, self.values.copy(), self.order.copy(), self.ranks.copy(),
+                             self.region_order.copy(), self.region_share.copy())
+
+class AggregateView:
+    """Agrégats figés d'un instantané : chaque lecture est un accès direct au tableau"""
+    __slots__ = ('keys', 'index', 'values', 'order', 'ranks', 'region_order', 'region_share')
+    
+    def __init__(self, keys, values, order, ranks, region_order, region_share):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.values = values
+        self.order = order
+        self.ranks = ranks
+        self.region_order = region_order
+        self.region_share = region_share
+    
+    def get(self, field, key):
+        """Valeur du champ `field` (ex. 'mean 1 h', 'share') pour la clé `key`"""
+        return float(self.values[AGGREGATE_FIELD_INDEX[field], self.index[key]])
+    
+    def rank(self, key):
+        """Rang (1 = plus regardée) de la chaîne `key`"""
+        return int(self.ranks[self.index[key]])
+    
+    def freeze(self):
+        """Déjà figé : partagé tel quel entre instantanés"""
+        return self
+
+class AudienceSource(ABC):
+    """Source d'audience qui fait avancer un FranceTVAllChannels d'un pas"""
+    
+    @abstractmethod
+    def advance(self, model):
+        """Applique au modèle les mesures disponibles ; retourne False si rien de neuf"""
+
+class RandomWalkSource(AudienceSource):
+    """Simulation par marche aléatoire, volatilité selon la tranche horaire
+    
+    En mode déterministe (modèle créé avec une graine), les chaînes tirent dans leurs
+    propres flux, le groupe dans le sien, et l'heure vient de l'horloge simulée.
+    """
+    
+    def advance(self, model):
+        streams = model.streams
+        current_time = datetime.now() if model.clock is None else model.clock.advance()
+        
+        # Facteurs saisonniers réalistes, appliqués à toutes les chaînes en une passe
+        volatility = volatility_for_hour(current_time.hour)
+        if streams is None:
+            draws = None
+            rng = model.rng
+            total_viewers = model.engine.step(volatility)
+        else:
+            draws = streams.channel_draws()
+            rng = streams.group
+            total_viewers = model.engine.step(volatility, draws[:, 0])
+        
+        # Mise à jour métriques globales
+        model.global_metrics['total_viewers'] = total_viewers + int(rng.integers(500000, 800000, endpoint=True))
+        
+        # Digital (variations plus importantes)
+        digital_change = int(rng.integers(-1000000, 1500000, endpoint=True))
+        model.global_metrics['digital_traffic'] = max(
+            model.global_metrics['digital_traffic'] + digital_change, 
+            8000000
+        )
+        
+        # Mise à jour historique
+        model.update_history_data(current_time)
+        
+        # Rotation occasionnelle des programmes
+        if rng.random() < 0.15:
+            model.rotate_programs(None if draws is None else draws[:, 1:])
+        return True
+
+def read_audience_records(path, chunksize=50000):
+    """Lit un fichier d'audiences (CSV, JSONL ou Parquet) par blocs de DataFrame
+    
+    Colonnes attendues : timestamp, channel, viewers. Les lignes dont `channel` vaut
+    'total' ou 'digital' alimentent les métriques globales.
+    """
+    import pandas as pd
+    
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        yield from pd.read_csv(path, chunksize=chunksize, parse_dates=['timestamp'])
+    elif suffix in ('.jsonl', '.ndjson'):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunksize):
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+            yield chunk
+    elif suffix == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("La relecture de fichiers Parquet nécessite pyarrow (pip install pyarrow)") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+            yield chunk
+    else:
+        raise ValueError(f"Format de fichier non pris en charge : {path.name}")
+
+# Horodatages appliqués par pas au plus vite (vitesse 0) : une heure de minutes toutes les 5 s
+REPLAY_BATCH = 60
+
+class FileReplaySource(AudienceSource):
+    """Rejoue des mesures enregistrées, minute par minute, depuis un fichier lu par blocs
+    
+    `speed` règle la cadence : 1.0 pour le temps réel, 10 ou 100 en accéléré, None
+    (ou 0) pour appliquer jusqu'à `batch` horodatages par pas, aussi vite que le
+    cadenceur appelle. Le fichier doit être trié par horodatage.
+    """
+    def __init__(self, path, speed=1.0, chunksize=50000, clock=time.monotonic, batch=REPLAY_BATCH):
+        self.path = path
+        self.speed = speed
+        self.batch = batch
+        self.chunksize = chunksize
+        self.clock = clock
+        self._groups = self._iter_groups()
+        self._pending = next(self._groups, None)
+        self._origin = None
+        self._started = False
+        self.exhausted = self._pending is None
+    
+    def _iter_groups(self):
+        """Regroupe les lignes par horodatage, y compris à cheval sur deux blocs"""
+        import pandas as pd
+        
+        carry = None
+        for chunk in read_audience_records(self.path, self.chunksize):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            last = chunk['timestamp'].iloc[-1]
+            complete = chunk['timestamp'] != last
+            for timestamp, group in chunk[complete].groupby('timestamp', sort=False):
+                yield timestamp, group
+            carry = chunk[~complete]
+        if carry is not None and len(carry):
+            yield carry['timestamp'].iloc[0], carry
+    
+    def _replay_time(self):
+        """Horodatage atteint par la relecture selon la vitesse choisie"""
+        if self._origin is None:
+            self._origin = (self.clock(), self._pending[0])
+        started, first_timestamp = self._origin
+        return first_timestamp + timedelta(seconds=(self.clock() - started) * self.speed)
+    
+    def advance(self, model):
+        if self._pending is None:
+            self.exhausted = True
+            return False
+        
+        due = None if not self.speed else self._replay_time()
+        applied = 0
+        # Rattrape tous les horodatages échus ; au plus `batch` par pas en mode « au plus vite »
+        while self._pending is not None and (due is None or self._pending[0] <= due):
+            timestamp, group = self._pending
+            self._apply(model, timestamp, group)
+            applied += 1
+            self._pending = next(self._groups, None)
+            if due is None and applied >= self.batch:
+                break
+        return applied > 0
+    
+    def _apply(self, model, timestamp, group):
+        """Reporte une minute de mesures dans le moteur, les métriques et l'historique"""
+        if not self._started:
+            # L'historique synthétique finit maintenant, le fichier est dans le passé :
+            # l'historique et les agrégats repartent du premier horodatage rejoué
+            model.data_history.clear()
+            model.aggregates.clear()
+            # Les pics du catalogue n'amorcent que la simulation : ceux du jour rejoué viennent du fichier
+            model.aggregates.seed_peaks = None
+            # L'état en mémoire ne reflète plus le journal : plus de point de reprise
+            model.checkpoint_through = None
+            self._started = True
+        measures = dict(zip(group['channel'], group['viewers']))
+        viewers = model.engine.viewers.copy()
+        for i, channel in enumerate(model.engine.names):
+            if channel in measures:
+                viewers[i] = measures[channel]
+        total_viewers = model.engine.apply(viewers)
+        
+        model.global_metrics['total_viewers'] = int(measures.get('total', total_viewers))
+        if 'digital' in measures:
+            model.global_metrics['digital_traffic'] = int(measures['digital'])
+        model.update_history_data(timestamp.to_pydatetime())
+
+# Ingestion de flux en direct : une ligne JSON par mesure, sur TCP (hôte:port) ou socket Unix (chemin)
+INGEST_QUEUE_SIZE = 65536
+INGEST_OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest')
+# Retard toléré (secondes) sur l'horodatage d'une mesure par rapport au pas précédent
+INGEST_LATENESS = 10.0
+INGEST_READ_SIZE = 64 * 1024
+INGEST_COUNTERS = ('received', 'dropped', 'late', 'malformed', 'rejected')
+
+def parse_feed_address(address):
+    """(hôte, port) pour 'hôte:port', (None, chemin) pour une socket Unix"""
+    if '/' in address:
+        return None, address
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+class FeedIngestSource(AudienceSource):
+    """Reçoit des flux d'audience concurrents sur une socket locale et les regroupe par pas
+    
+    Chaque connexion envoie des lignes JSON {"kind", "key", "value", "ts"} : `kind` vaut
+    'channel' (une chaîne, ou 'total'), 'region' (geo_data) ou 'digital' ('digital_traffic'
+    ou une plateforme de platform_data) ; `ts` (secondes epoch) vaut par défaut l'heure de
+    réception. Les mesures passent par une file bornée ; une fois pleine, `overflow` choisit
+    entre ralentir les émetteurs ('block' : la socket n'est plus lue et TCP répercute la
+    contre-pression), écarter les nouvelles mesures ('drop_newest') ou les plus anciennes
+    ('drop_oldest'). Le regroupeur ne garde que la mesure la plus récente par clé jusqu'au
+    pas suivant ; une mesure plus ancienne que la dernière appliquée pour sa clé, ou que le
+    pas précédent (le démarrage, avant le premier pas) moins `lateness` secondes, est
+    écartée comme tardive.
+    """
+    def __init__(self, address, queue_size=INGEST_QUEUE_SIZE, overflow='block', lateness=INGEST_LATENESS,
+                 metrics=None):
+        if overflow not in INGEST_OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue : {overflow!r}")
+        self.address = address
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.lateness = lateness
+        self.metrics = metrics if metrics is not None else Instrumentation()
+        self.counters = dict.fromkeys(INGEST_COUNTERS, 0)
+        self._reported = dict(self.counters)
+        self.bound_address = None
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        # Dernière mesure par (kind, key) en attente du prochain pas, et horodatage de la dernière appliquée
+        self._pending = {}
+        self._applied = {}
+        self._watermark = None
+    
+    def start(self):
+        """Démarre la boucle asyncio dans un thread dédié ; les erreurs d'écoute remontent ici"""
+        # Dès le premier pas, une mesure antérieure au démarrage moins `lateness` est tardive
+        self._watermark = time.time() - self.lateness
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='francetv-ingest', daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._listen(), self._loop).result()
+        return self
+    
+    def close(self):
+        """Ferme l'écoute et arrête la boucle"""
+        if self._loop is None:
+            return
+        
+        async def shutdown():
+            self._server.close()
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+    
+    async def _listen(self):
+        self._queue = asyncio.Queue(self.queue_size)
+        host, port = parse_feed_address(self.address)
+        if host is None:
+            self._server = await asyncio.start_unix_server(self._handle, path=port)
+            self.bound_address = port
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            # Avec le port 0, le système en choisit un libre
+            self.bound_address = '%s:%d' % self._server.sockets[0].getsockname()[:2]
+        self._batcher = asyncio.create_task(self._batch())
+    
+    async def _handle(self, reader, writer):
+        """Une connexion par flux : lignes lues par blocs, pas une à une"""
+        carry = b''
+        try:
+            while chunk := await reader.read(INGEST_READ_SIZE):
+                lines = (carry + chunk).split(b'\n')
+                carry = lines.pop()
+                for line in lines:
+                    if line.strip():
+                        await self._enqueue(line)
+                # Un flux rapide ne doit pas monopoliser la boucle : les autres flux, le
+                # regroupeur et la prise de lot passent entre deux blocs
+                await asyncio.sleep(0)
+            if carry.strip():
+                await self._enqueue(carry)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _enqueue(self, line):
+        counters, queue = self.counters, self._queue
+        try:
+            message = json.loads(line)
+            record = (message['kind'], message['key'], float(message['value']),
+                      float(message.get('ts') or time.time()))
+        except (ValueError, KeyError, TypeError):
+            counters['malformed'] += 1
+            return
+        counters['received'] += 1
+        if not queue.full():
+            queue.put_nowait(record)
+        elif self.overflow == 'block':
+            await queue.put(record)
+        elif self.overflow == 'drop_newest':
+            counters['dropped'] += 1
+        else:
+            queue.get_nowait()
+            queue.put_nowait(record)
+            counters['dropped'] += 1
+    
+    async def _batch(self):
+        """Vide la file au fil de l'eau dans le lot du prochain pas"""
+        queue, applied, counters = self._queue, self._applied, self.counters
+        while True:
+            record = await queue.get()
+            pending, watermark = self._pending, self._watermark
+            while True:
+                kind, key, value, ts = record
+                ident = (kind, key)
+                current = pending.get(ident)
+                if ts < watermark or ts <= applied.get(ident, watermark) or (current is not None and ts < current[0]):
+                    counters['late'] += 1
+                else:
+                    pending[ident] = (ts, value)
+                if queue.empty():
+                    break
+                record = queue.get_nowait()
+    
+    async def _take(self):
+        """Lot du pas courant ; exécuté dans la boucle, donc sans verrou avec le regroupeur"""
+        batch, self._pending = self._pending, {}
+        for ident, (ts, _) in batch.items():
+            self._applied[ident] = ts
+        self._watermark = time.time() - self.lateness
+        return batch, self._queue.qsize()
+    
+    def advance(self, model):
+        if self._loop is None:
+            return False
+        started = time.perf_counter()
+        batch, depth = asyncio.run_coroutine_threadsafe(self._take(), self._loop).result()
+        if batch:
+            self._apply(model, batch)
+        
+        metrics = self.metrics
+        metrics.observe('ingest_queue_depth', depth)
+        metrics.observe('ingest_batch_records', len(batch))
+        counters = dict(self.counters)
+        for name, value in counters.items():
+            metrics.observe(f'ingest_{name}', value - self._reported[name])
+        self._reported = counters
+        metrics.observe('ingest_apply_seconds', time.perf_counter() - started)
+        return bool(batch)
+    
+    def _apply(self, model, batch):
+        """Reporte un lot dans le moteur, les métriques, les régions, les plateformes et l'historique"""
+        engine, metrics = model.engine, model.global_metrics
+        viewers = None
+        total = None
+        rejected = 0
+        for (kind, key), (_, value) in batch.items():
+            if kind == 'channel' and key in model.channel_index:
+                if viewers is None:
+                    viewers = engine.viewers.copy()
+                viewers[model.channel_index[key]] = value
+            elif kind == 'channel' and key == 'total':
+                total = value
+            elif kind == 'region' and key in model.geo_data:
+                model.geo_data[key] = int(round(value))
+            elif kind == 'digital' and key == 'digital_traffic':
+                metrics['digital_traffic'] = int(round(value))
+            elif kind == 'digital' and key in model.platform_data:
+                # Les plateformes restent du type du catalogue (entiers partagés tels quels)
+                current = model.platform_data[key]
+                model.platform_data[key] = int(round(value)) if isinstance(current, int) else value
+            else:
+                rejected += 1
+        self.counters['rejected'] += rejected
+        
+        if viewers is not None:
+            total_viewers = engine.apply(viewers)
+            metrics['total_viewers'] = int(total_viewers if total is None else total)
+        elif total is not None:
+            metrics['total_viewers'] = int(total)
+        # En mode déterministe, chaque lot avance l'horloge simulée d'un pas, comme la simulation
+        model.update_history_data(None if model.clock is None else model.clock.advance())
+
+# Générateur de flux factices : rafales espacées de FAKE_FEED_BURST secondes sur chaque connexion
+FAKE_FEED_BURST = 0.01
+
+async def _fake_feed(address, kind, key, base, rate, deadline, rng, late_fraction, sent):
+    """Un flux : marche aléatoire autour de `base`, `rate` mesures par seconde"""
+    host, port = parse_feed_address(address)
+    if host is None:
+        _, writer = await asyncio.open_unix_connection(port)
+    else:
+        _, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    prefix = json.dumps({'kind': kind, 'key': key}, ensure_ascii=False)[:-1]
+    value, owed = float(base), 0.0
+    next_burst = loop.time()
+    try:
+        while deadline is None or loop.time() < deadline:
+            owed += rate * FAKE_FEED_BURST
+            count = int(owed)
+            owed -= count
+            if count:
+                values = value * np.cumprod(1 + rng.normal(0, 0.002, count))
+                values = np.maximum(values, base * 0.3)
+                value = float(values[-1])
+                # Une part des mesures arrive en retard, pour exercer la politique de retard
+                stamps = time.time() - np.where(rng.random(count) < late_fraction, rng.uniform(0, 60, count), 0.0)
+                writer.write(''.join(
+                    f'{prefix}, "value": {v:.0f}, "ts": {t:.3f}}}\n' for v, t in zip(values.tolist(), stamps.tolist())
+                ).encode('utf-8'))
+                await writer.drain()  # Contre-pression : attend que le récepteur lise
+                sent[0] += count
+            next_burst += FAKE_FEED_BURST
+            await asyncio.sleep(max(next_burst - loop.time(), 0))
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def run_fake_feeds(address, rate, duration=None, late_fraction=0.01, seed=None):
+    """Pousse environ `rate` mesures par seconde, réparties sur un flux par chaîne, par région
+    et par métrique numérique ; retourne (mesures envoyées, durée en secondes)"""
+    catalog = load_catalog()
+    feeds = ([('channel', name, data['viewers']) for name, data in catalog['channels'].items()]
+             + [('region', name, viewers) for name, viewers in catalog['regions'].items()]
+             + [('digital', 'digital_traffic', 12500000)]
+             + [('digital', name, share) for name, share in catalog['platforms'].items()])
+    rngs = np.random.default_rng(seed).spawn(len(feeds))
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = None if duration is None else started + duration
+    sent = [0]
+    await asyncio.gather(*(
+        _fake_feed(address, kind, key, base, rate / len(feeds), deadline, rng, late_fraction, sent)
+        for (kind, key, base), rng in zip(feeds, rngs)
+    ))
+    return sent[0], loop.time() - started
+
+# Journal binaire des audiences : un segment par jour, un enregistrement de taille fixe par pas
+AUDIENCE_LOG_MAGIC = b'FTVLOG01'
+AUDIENCE_LOG_HEADER = 4096
+# Profondeur rechargée au démarrage : la rétention du niveau agrégé le plus grossier
+AUDIENCE_LOG_RESTORE_DAYS = 30
+# Intervalle (temps du journal) entre deux points de reprise des niveaux agrégés et des
+# agrégats : au redémarrage, seuls les pas postérieurs au dernier point sont réintégrés
+AUDIENCE_LOG_CHECKPOINT_INTERVAL = 600
+
+def audience_record_dtype(width):
+    """Enregistrement : horodatage (ms depuis l'epoch) puis une valeur par clé"""
+    return np.dtype([('timestamp', '<i8'), ('values', '<i8', (width,))])
+
+class AudienceLog:
+    """Journal en ajout seul, relu par projection mémoire au redémarrage
+    
+    Chaque segment `audience-AAAA-MM-JJ.log` commence par un en-tête de
+    AUDIENCE_LOG_HEADER octets (signature, puis la liste des clés en JSON), suivi
+    d'enregistrements de taille fixe. Un enregistrement tronqué par un arrêt brutal
+    est écarté à la relecture et écrasé à la réouverture.
+    """
+    def __init__(self, directory, keys):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keys = tuple(keys)
+        self.dtype = audience_record_dtype(len(self.keys))
+        self._record = np.zeros(1, dtype=self.dtype)
+        self._file = None
+        self._day = None
+    
+    def segment_path(self, day, part=0):
+        suffix = f'.{part}' if part else ''
+        return self.directory / f'audience-{day.isoformat()}{suffix}.log'
+    
+    def segments(self, since=None):
+        """Segments du journal dans l'ordre chronologique, à partir du jour `since`"""
+        paths = []
+        for path in self.directory.glob('audience-*.log'):
+            day, _, part = path.stem[len('audience-'):].partition('.')
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+            if since is None or day >= since:
+                paths.append((day, int(part or 0), path))
+        return [path for _, _, path in sorted(paths)]
+    
+    @staticmethod
+    def read_header(path):
+        """Clés enregistrées dans l'en-tête d'un segment"""
+        with open(path, 'rb') as f:
+            header = f.read(AUDIENCE_LOG_HEADER)
+        if len(header) < AUDIENCE_LOG_HEADER or header[:8] != AUDIENCE_LOG_MAGIC:
+            raise ValueError(f"Segment de journal invalide : {path}")
+        length = int.from_bytes(header[8:12], 'little')
+        return tuple(json.loads(header[12:12 + length]))
+    
+    def _open(self, day):
+        """Ouvre le segment du jour, ou un nouveau si la grille de chaînes a changé"""
+        self.close()
+        part = 0
+        while True:
+            path = self.segment_path(day, part)
+            if not path.exists() or path.stat().st_size < AUDIENCE_LOG_HEADER:
+                self._file = open(path, 'wb')
+                keys = json.dumps(self.keys, ensure_ascii=False).encode('utf-8')
+                if 12 + len(keys) > AUDIENCE_LOG_HEADER:
+                    raise ValueError("Trop de clés pour l'en-tête du journal")
+                header = AUDIENCE_LOG_MAGIC + len(keys).to_bytes(4, 'little') + keys
+                self._file.write(header.ljust(AUDIENCE_LOG_HEADER, b'\0'))
+                break
+            if self.read_header(path) == self.keys:
+                # Reprise : on écrase un éventuel enregistrement incomplet en fin de fichier
+                records = (path.stat().st_size - AUDIENCE_LOG_HEADER) // self.dtype.itemsize
+                self._file = open(path, 'r+b')
+                self._file.truncate(AUDIENCE_LOG_HEADER + records * self.dtype.itemsize)
+                self._file.seek(0, os.SEEK_END)
+                break
+            part += 1
+        self._day = day
+    
+    def append(self, timestamp, row):
+        """Écrit un pas (une valeur par clé, dans l'ordre de `keys`) dans le segment du jour"""
+        day = timestamp.date()
+        if day != self._day:
+            self._open(day)
+        record = self._record
+        record['timestamp'] = np.datetime64(timestamp, 'ms').astype(np.int64)
+        record['values'] = row
+        self._file.write(record.tobytes())
+        self._file.flush()
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+    
+    def map_segment(self, path):
+        """Projection mémoire en lecture seule des enregistrements complets d'un segment"""
+        keys = self.read_header(path)
+        dtype = audience_record_dtype(len(keys))
+        count = (path.stat().st_size - AUDIENCE_LOG_HEADER) // dtype.itemsize
+        if not count:
+            return keys, np.empty(0, dtype=dtype)
+        return keys, np.memmap(path, dtype=dtype, mode='r', offset=AUDIENCE_LOG_HEADER, shape=(count,))
+    
+    def _columns(self, keys, records):
+        """Valeurs d'un segment (forme (clés, points)) remises dans l'ordre de `keys` ;
+        une clé absente d'un segment ancien vaut 0"""
+        if keys == self.keys:
+            return records['values'].T
+        block = np.zeros((len(self.keys), len(records)), dtype=np.int64)
+        columns = {key: i for i, key in enumerate(keys)}
+        for i, key in enumerate(self.keys):
+            if key in columns:
+                block[i] = records['values'][:, columns[key]]
+        return block
+    
+    def load(self, since=None, after=None, last=None):
+        """Horodatages et valeurs (forme (clés, points)) journalisés depuis le jour `since`
+        
+        `after` (datetime64) ne garde que les pas postérieurs, `last` que les `last` derniers :
+        les segments sont parcourus du plus récent au plus ancien et seuls les pas retenus
+        sont copiés, si bien que le coût ne dépend pas de la profondeur du journal.
+        """
+        timestamps, blocks, count = [], [], 0
+        after = None if after is None else np.datetime64(after, 'ms').astype(np.int64)
+        for path in reversed(self.segments(since)):
+            keys, records = self.map_segment(path)
+            start = 0 if after is None else int(np.searchsorted(records['timestamp'], after, side='right'))
+            if last is not None:
+                start = max(start, len(records) - (last - count))
+            records = records[start:]
+            if len(records):
+                timestamps.append(records['timestamp'])
+                blocks.append(self._columns(keys, records))
+                count += len(records)
+            if start > 0:
+                break
+        if not timestamps:
+            return np.empty(0, dtype='datetime64[ms]'), np.empty((len(self.keys), 0), dtype=np.int64)
+        return (np.concatenate(timestamps[::-1]).astype('datetime64[ms]'),
+                np.concatenate(blocks[::-1], axis=1))
+    
+    @property
+    def checkpoint_path(self):
+        return self.directory / 'checkpoint.npz'
+    
+    def write_checkpoint(self, through, state):
+        """Sauvegarde `state` (tableaux nommés) valable jusqu'au pas `through` inclus
+        
+        Écrit dans un fichier temporaire puis le renomme : un arrêt pendant l'écriture
+        laisse le point de reprise précédent intact.
+        """
+        path = self.checkpoint_path
+        tmp = path.with_name(f'{path.stem}.{os.getpid()}.tmp.npz')
+        np.savez(tmp, keys=np.array(json.dumps(self.keys, ensure_ascii=False)),
+                 through=np.datetime64(through, 'ms'), **state)
+        os.replace(tmp, path)
+    
+    def read_checkpoint(self):
+        """(through, state) du dernier point de reprise, ou None s'il manque ou vaut pour d'autres clés"""
+        try:
+            with np.load(self.checkpoint_path) as data:
+                if tuple(json.loads(data['keys'].item())) != self.keys:
+                    return None
+                return data['through'][()], {name: data[name] for name in data.files
+                                              if name not in ('keys', 'through')}
+        except (OSError, ValueError, KeyError) as exc:
+            if not isinstance(exc, FileNotFoundError):
+                warnings.warn(f"Point de reprise illisible, journal relu en entier : {exc!r}")
+            return None
+    
+    def latest_keys(self, since=None):
+        """Clés du dernier segment non vide depuis `since` (celles de la dernière mesure)"""
+        for path in reversed(self.segments(since)):
+            keys, records = self.map_segment(path)
+            if len(records):
+                return keys
+        return ()
 
 class FranceTVAllChannels:
-    def __init__(self):
-        self.data_history = {}
+    def __init__(self, history_points=MAX_HISTORY_POINTS, extra_channels=None, rng=None, backfill_days=0,
+                 source=None, log_dir=None, seed=None, start=SIMULATION_START):
+        self.history_points = history_points
+        self.extra_channels = extra_channels or {}
+        # Avec `seed`, la simulation est reproductible : flux dérivés de la graine, horloge simulée
+        self.seed = seed
+        self.clock = None if seed is None else SimulationClock(start, timedelta(seconds=DATA_TICK_INTERVAL))
+        if rng is None:
+            rng = np.random.default_rng(None if seed is None else np.random.SeedSequence(seed, spawn_key=(STREAM_MODEL,)))
+        self.rng = rng
+        self.source = source if source is not None else RandomWalkSource()
+        self.audience_log = None
+        # Dernier pas sauvegardé dans un point de reprise ; None tant que l'état en mémoire ne
+        # provient pas du seul journal (historique initial simulé, rejeu) : pas de point de reprise
+        self.checkpoint_through = None
         self.initialize_all_channels_data()
+        if backfill_days:
+            self.backfill_history(backfill_days)
+        if log_dir:
+            self.audience_log = AudienceLog(log_dir, self.data_history.keys)
+            self.restore_from_log()
         
     def initialize_all_channels_data(self):
         """Initialise les données pour toutes les chaînes France Télévisions"""
-        self.current_time = datetime.now()
+        self.current_time = self.now()
+        
+        catalog = load_catalog()
         
         # Données réalistes pour toutes les chaînes
-        self.channels_data = {
-            'France 2': {
-                'viewers': 2100000,
-                'share': 13.2,
-                'program': 'Journal de 13h',
-                'trend': 'up',
-                'change': '+2.1%',
-                'category': 'Généraliste',
-                'color': '#0055A4',
-                'peak_today': 4200000
-            },
-            'France 3': {
-                'viewers': 1800000,
-                'share': 10.5,
-                'program': 'Magazines régionaux',
-                'trend': 'stable',
-                'change': '+0.3%',
-                'category': 'Régionale',
-                'color': '#EF4135',
-                'peak_today': 3200000
-            },
-            'France 4': {
-                'viewers': 450000,
-                'share': 2.8,
-                'program': 'Jeunesse et divertissement',
-                'trend': 'up',
-                'change': '+1.5%',
-                'category': 'Jeunesse',
-                'color': '#00A8E8',
-                'peak_today': 850000
-            },
-            'France 5': {
-                'viewers': 850000,
-                'share': 4.8,
-                'program': 'Documentaire scientifique',
-                'trend': 'up',
-                'change': '+1.2%',
-                'category': 'Savoir',
-                'color': '#8A2BE2',
-                'peak_today': 1800000
-            },
-            'France Info': {
-                'viewers': 350000,
-                'share': 2.1,
-                'program': 'Info continue',
-                'trend': 'stable',
-                'change': '+0.8%',
-                'category': 'Info',
-                'color': '#FF6B00',
-                'peak_today': 650000
-            },
-            'Culturebox': {
-                'viewers': 280000,
-                'share': 1.7,
-                'program': 'Spectacle vivant',
-                'trend': 'up',
-                'change': '+2.3%',
-                'category': 'Culture',
-                'color': '#FF4081',
-                'peak_today': 520000
-            },
-            'France Ô': {
-                'viewers': 180000,
-                'share': 1.1,
-                'program': 'Magazine Outre-Mer',
-                'trend': 'stable',
-                'change': '+0.5%',
-                'category': 'Outre-Mer',
-                'color': '#FFD700',
-                'peak_today': 380000
-            }
-        }
+        channels = dict(catalog['channels'])
         
         # Métriques globales
         self.global_metrics = {
@@ -162,169 +1759,990 @@ class FranceTVAllChannels:
         }
         
         # Données géographiques détaillées
-        self.geo_data = {
-            'Île-de-France': 1250000,
-            'Auvergne-Rhône-Alpes': 680000,
-            'Provence-Alpes-Côte d\'Azur': 580000,
-            'Occitanie': 520000,
-            'Hauts-de-France': 480000,
-            'Nouvelle-Aquitaine': 450000,
-            'Grand Est': 420000,
-            'Normandie': 320000,
-            'Pays de la Loire': 350000,
-            'Bretagne': 300000,
-            'Bourgogne-Franche-Comté': 280000,
-            'Centre-Val de Loire': 260000,
-            'Corse': 75000,
-            'Outre-Mer': 180000
-        }
+        self.geo_data = dict(catalog['regions'])
         
         # Plateformes
-        self.platform_data = {
-            'Télévision traditionnelle': 68,
-            'France.tv (replay)': 18,
-            'Application mobile': 9,
-            'Web direct': 3,
-            'TV connectée': 2
-        }
+        self.platform_data = dict(catalog['platforms'])
+        
+        # Grille étendue (régions, outre-mer, FAST) au-delà des chaînes nationales
+        channels.update(self.extra_channels)
+        
+        # Colonnes d'affichage codées ; les valeurs numériques vivent dans le moteur vectorisé
+        self.channel_index = {channel: i for i, channel in enumerate(channels)}
+        self.categories = Vocabulary()
+        # Tous les programmes du catalogue d'emblée : le vocabulaire ne change plus ensuite
+        self.programs = Vocabulary(
+            program for data in catalog['channels'].values() for program in data['programs']
+        )
+        self.colors = Vocabulary()
+        self.category_codes = self.categories.codes(data['category'] for data in channels.values())
+        self.program_codes = self.programs.codes(data['program'] for data in channels.values())
+        self.color_codes = self.colors.codes(data['color'] for data in channels.values())
+        
+        trend_codes = {label: code for code, label in TREND_LABELS.items()}
+        self.engine = ChannelEngine(
+            list(channels),
+            [data['viewers'] for data in channels.values()],
+            change_pct=[float(data['change'].rstrip('%')) for data in channels.values()],
+            trend=[trend_codes[data['trend']] for data in channels.values()],
+            rng=self.rng
+        )
+        self.streams = None if self.seed is None else SimulationStreams(self.seed, range(len(channels)))
+        self._history_row = np.zeros(len(channels) + 2, dtype=np.int64)
+        
+        # Marché TV estimé à partir des parts du catalogue : sert aux parts de marché en direct
+        national = catalog['channels'].values()
+        market_viewers = sum(data['viewers'] for data in national) / sum(data['share'] for data in national) * 100
+        self.aggregates = AudienceAggregates(
+            list(channels) + ['total', 'digital'], len(channels),
+            peaks=[data['peak_today'] for data in channels.values()], market_viewers=market_viewers
+        )
         
         self.init_history_data()
     
+    def channel_table(self):
+        """Copie en colonnes de l'état courant des chaînes"""
+        engine, aggregates = self.engine, self.aggregates
+        return ChannelTable(
+            engine.names, self.channel_index, engine.viewers.copy(), aggregates.peak_today(),
+            engine.change_pct.copy(), engine.trend.copy(), aggregates.market_share(), self.category_codes,
+            self.program_codes.copy(), self.color_codes, self.categories, self.programs, self.colors
+        )
+    
     def init_history_data(self):
         """Initialise l'historique des données pour toutes les chaînes"""
-        timestamps = [datetime.now() - timedelta(minutes=x) for x in range(120, 0, -2)]
+        self.data_history = HistoryRing(
+            list(self.engine.names) + ['total', 'digital'],
+            capacity=self.history_points
+        )
         
-        self.data_history = {'timestamp': timestamps}
+        # 60 points sur les deux dernières heures, selon le profil horaire
+        timestamps, rows = generate_backfill(
+            self.engine.viewers, self.now(), 60, interval=timedelta(minutes=2),
+            digital_traffic=self.global_metrics['digital_traffic'], rng=self.rng
+        )
+        self.data_history.extend(timestamps, rows)
+        self.aggregates.extend(timestamps, rows)
+        self.update_derived_metrics()
+    
+    def backfill_history(self, days, interval=timedelta(minutes=1), seed=None, end=None):
+        """Remplace l'historique par `days` jours de données synthétiques, en un appel
         
-        for channel in self.channels_data:
-            base_viewers = self.channels_data[channel]['viewers']
-            self.data_history[channel] = [
-                base_viewers + random.randint(-int(base_viewers * 0.1), int(base_viewers * 0.1))
-                for _ in range(60)
-            ]
+        Avec `seed` (et `end` fixé), la génération est reproductible indépendamment de `self.rng`.
+        """
+        points = int(timedelta(days=days) / interval)
+        rng = np.random.default_rng(seed) if seed is not None else self.rng
+        timestamps, rows = generate_backfill(
+            self.engine.viewers, end or self.now(), points, interval=interval,
+            digital_traffic=self.global_metrics['digital_traffic'], rng=rng
+        )
+        self.data_history.clear()
+        self.data_history.extend(timestamps, rows)
+        self.aggregates.clear()
+        self.aggregates.extend(timestamps, rows)
+        self.update_derived_metrics()
+    
+    def checkpoint_state(self):
+        """Niveaux agrégés et agrégats à sauvegarder dans un point de reprise du journal"""
+        state = {f'aggregates_{name}': value for name, value in self.aggregates.state().items()}
+        for i, level in enumerate(self.data_history.rollups):
+            state[f'rollup{i}_seconds'] = level.seconds
+            state.update({f'rollup{i}_{name}': value for name, value in level.state().items()})
+        return state
+    
+    def load_checkpoint_state(self, state):
+        """Reprend un checkpoint_state() ; retourne False si les niveaux ne correspondent plus"""
+        levels = self.data_history.rollups
+        for i, level in enumerate(levels):
+            if (f'rollup{i}_seconds' not in state or int(state[f'rollup{i}_seconds']) != level.seconds
+                    or len(state[f'rollup{i}_counts']) > level.capacity):
+                return False
+        if f'rollup{len(levels)}_seconds' in state:
+            return False
+        prefix = len('aggregates_')
+        self.aggregates.load_state({name[prefix:]: value for name, value in state.items()
+                                    if name.startswith('aggregates_')})
+        for i, level in enumerate(levels):
+            level.load_state({name: state[f'rollup{i}_{name}']
+                              for name in ('mins', 'maxs', 'sums', 'counts', 'starts', 'bucket')})
+        return True
+    
+    def write_checkpoint(self, through):
+        self.audience_log.write_checkpoint(through, self.checkpoint_state())
+        self.checkpoint_through = np.datetime64(through, 'ms')
+    
+    def restore_from_log(self, days=AUDIENCE_LOG_RESTORE_DAYS):
+        """Recharge l'historique, les dernières audiences et les pics du jour depuis le journal
         
-        self.data_history['total'] = [
-            self.global_metrics['total_viewers'] + random.randint(-200000, 200000)
-            for _ in range(60)
-        ]
-        self.data_history['digital'] = [
-            self.global_metrics['digital_traffic'] + random.randint(-500000, 500000)
-            for _ in range(60)
-        ]
+        Seuls les `capacity` derniers pas sont relus pour l'historique brut. Les niveaux
+        agrégés et les agrégats repartent du dernier point de reprise, complété par les pas
+        journalisés depuis ; sans point de reprise valable, ils sont recalculés sur tout le
+        journal, puis un point de reprise est écrit. Retourne False si le journal est vide :
+        l'historique initial est alors conservé.
+        """
+        log = self.audience_log
+        since = (datetime.now() - timedelta(days=days)).date()
+        timestamps, rows = log.load(since, last=self.data_history.capacity)
+        if not len(timestamps):
+            return False
+        # Fenêtres, pics du jour et classement repartent des mesures journalisées
+        self.data_history.clear()
+        self.aggregates.clear()
+        checkpoint = log.read_checkpoint()
+        if (checkpoint is not None and np.datetime64(since, 'ms') <= checkpoint[0] <= timestamps[-1]
+                and self.load_checkpoint_state(checkpoint[1])):
+            through = checkpoint[0]
+            self.data_history.extend(timestamps, rows, rollups=False)
+            recent = timestamps > through
+            if recent.all():
+                # Des pas journalisés après le point de reprise précèdent l'historique brut relu
+                missing = log.load(since, after=through)
+                self.data_history.extend_rollups(*missing)
+                self.aggregates.extend(*missing)
+            else:
+                self.data_history.extend_rollups(timestamps[recent], rows[:, recent])
+                self.aggregates.extend(timestamps[recent], rows[:, recent])
+            self.checkpoint_through = through
+        else:
+            full = log.load(since)
+            self.data_history.extend_rollups(*full)
+            self.data_history.extend(timestamps, rows, rollups=False)
+            self.aggregates.extend(*full)
+            self.write_checkpoint(timestamps[-1])
+        
+        # Seules les clés présentes dans le dernier segment ont une mesure réelle : une chaîne
+        # ajoutée depuis (0 dans le journal) garde son audience du catalogue
+        measured = set(log.latest_keys(since))
+        keys = self.data_history.keys
+        channels = np.fromiter((key in measured for key in keys[:-2]), dtype=bool, count=len(keys) - 2)
+        self.engine.viewers[channels] = rows[:-2, -1][channels]
+        for i, key in ((-2, 'total_viewers'), (-1, 'digital_traffic')):
+            if keys[i] in measured:
+                self.global_metrics[key] = int(rows[i, -1])
+        self.update_derived_metrics()
+        return True
     
     def update_live_data(self):
-        """Met à jour toutes les données en temps réel"""
-        current_time = datetime.now()
-        hour = current_time.hour
-        
-        # Facteurs saisonniers réalistes
-        if hour in [8, 13, 20]:  # Pic des journaux
-            volatility = 0.07
-        elif 20 <= hour <= 23:  # Prime time
-            volatility = 0.05
-        elif 0 <= hour <= 6:  # Nuit
-            volatility = 0.12
-        else:  # Journée normale
-            volatility = 0.04
-        
-        # Mise à jour de chaque chaîne
-        total_viewers = 0
-        
-        for channel in self.channels_data:
-            current_viewers = self.channels_data[channel]['viewers']
-            change = random.randint(-int(current_viewers * volatility), int(current_viewers * volatility))
-            
-            new_viewers = max(current_viewers + change, int(current_viewers * 0.3))
-            self.channels_data[channel]['viewers'] = new_viewers
-            total_viewers += new_viewers
+        """Met à jour toutes les données en temps réel à partir de la source d'audience"""
+        return self.source.advance(self)
+    
+    def now(self):
+        """Heure courante : celle de l'horloge simulée en mode déterministe"""
+        return datetime.now() if self.clock is None else self.clock.now
+    
+    def rotate_programs(self, draws=None):
+        """Change occasionnellement les programmes
+        
+        `draws` : deux tirages [0, 1) par chaîne (rotation, choix) venus des flux des
+        chaînes en mode déterministe ; sinon ils sont tirés de `rng`.
+        """
+        for channel, data in load_catalog()['channels'].items():
+            index = self.channel_index[channel]
+            rotate, choice = self.rng.random(2) if draws is None else draws[index]
+            if rotate < 0.3:  # 30% de chance par chaîne
+                programs = data['programs']
+                self.program_codes[index] = self.programs.code(programs[int(choice * len(programs))])
+    
+    def update_history_data(self, current_time=None):
+        """Met à jour l'historique"""
+        current_time = current_time or self.now()
+        
+        row = self._history_row
+        row[:-2] = self.engine.viewers
+        row[-2] = self.global_metrics['total_viewers']
+        row[-1] = self.global_metrics['digital_traffic']
+        self.data_history.append(np.datetime64(current_time, 'ms'), row)
+        self.aggregates.update(current_time, row)
+        self.update_derived_metrics()
+        if self.audience_log is not None:
+            self.audience_log.append(current_time, row)
+            stamp = np.datetime64(current_time, 'ms')
+            if (self.checkpoint_through is not None
+                    and stamp - self.checkpoint_through >= np.timedelta64(AUDIENCE_LOG_CHECKPOINT_INTERVAL, 's')):
+                self.write_checkpoint(stamp)
+    
+    def update_derived_metrics(self):
+        """Métriques globales déduites des agrégats : part de marché du groupe, engagement, régions
+        
+        L'engagement est la rétention de l'audience du groupe : moyenne des 5 dernières
+        minutes rapportée au maximum de la dernière heure.
+        """
+        aggregates = self.aggregates
+        total = aggregates.channel_count
+        values, field = aggregates.values, AGGREGATE_FIELD_INDEX
+        self.global_metrics['total_share'] = round(float(values[field['market_share'], total]), 1)
+        self.global_metrics['engagement_rate'] = int(round(
+            100 * values[field['mean 5 min'], total] / max(values[field['max 1 h'], total], 1)
+        ))
+        aggregates.rank_regions(list(self.geo_data.values()))
+
+# Intervalle de mise à jour de la simulation (secondes), indépendant du nombre d'écrans
+DATA_TICK_INTERVAL = 5
+
+# Cadences de rafraîchissement des fragments (secondes) : compteurs et grille,
+# courbes (valeur par défaut du curseur), carte et plateformes
+LIVE_REFRESH = 1
+CHART_REFRESH = 5
+SLOW_REFRESH = 60
+
+# Nombre d'échantillons conservés par mesure pour les percentiles glissants
+METRICS_WINDOW = 1024
+
+class RollingMetric:
+    """Derniers échantillons d'une mesure, plus le compte et la somme depuis le démarrage"""
+    def __init__(self, window=METRICS_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+    
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+    
+    def quantiles(self, qs=(50, 95, 99)):
+        """Percentiles glissants sur la fenêtre courante"""
+        samples = list(self.samples)
+        if not samples:
+            return [0.0] * len(qs)
+        return [float(q) for q in np.percentile(samples, qs)]
+
+class Instrumentation:
+    """Mesures de durée des sections de rendu et du cadencement, assez légères pour la production
+    
+    Chaque section enregistre sa durée (perf_counter). Le solde de blocs mémoire
+    alloués (sys.getallocatedblocks, qui parcourt le tas) n'est relevé qu'une exécution
+    sur `alloc_sample_every`, sans tracemalloc. Les percentiles ne sont calculés qu'à la lecture.
+    """
+    def __init__(self, window=METRICS_WINDOW, alloc_sample_every=16):
+        self.window = window
+        self.alloc_sample_every = alloc_sample_every
+        self._sections_run = 0
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def metric(self, name, section=''):
+        key = (name, section)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, RollingMetric(self.window))
+        return metric
+    
+    def observe(self, name, value, section=''):
+        self.metric(name, section).observe(value)
+    
+    @contextmanager
+    def section(self, section):
+        """Mesure le bloc `with` : durée en secondes et, par échantillonnage, blocs mémoire alloués"""
+        self._sections_run += 1
+        sampled = self._sections_run % self.alloc_sample_every == 0
+        blocks = sys.getallocatedblocks() if sampled else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('render_seconds', time.perf_counter() - start, section)
+            if sampled:
+                self.observe('render_alloc_blocks', sys.getallocatedblocks() - blocks, section)
+    
+    def summary(self):
+        """Une ligne par mesure : nom, section, nombre, p50, p95, p99"""
+        return [
+            {'mesure': name, 'section': section, 'n': metric.count,
+             **dict(zip(('p50', 'p95', 'p99'), metric.quantiles()))}
+            for (name, section), metric in sorted(self._metrics.items())
+        ]
+    
+    def to_prometheus(self, prefix='francetv_'):
+        """Export au format texte Prometheus (résumés avec quantiles)"""
+        lines = []
+        families = {}
+        for (name, section), metric in sorted(self._metrics.items()):
+            families.setdefault(name, []).append((section, metric))
+        for name, metrics in families.items():
+            lines.append(f"# TYPE {prefix}{name} summary")
+            for section, metric in metrics:
+                labels = f'section="{section}",' if section else ''
+                for q, value in zip((0.5, 0.95, 0.99), metric.quantiles()):
+                    lines.append(f'{prefix}{name}{{{labels}quantile="{q}"}} {value:.6g}')
+                suffix_labels = f'{{{labels.rstrip(",")}}}' if labels else ''
+                lines.append(f"{prefix}{name}_sum{suffix_labels} {metric.total:.6g}")
+                lines.append(f"{prefix}{name}_count{suffix_labels} {metric.count}")
+        return "\n".join(lines) + "\n"
+    
+    def write_prometheus(self, path):
+        """Écrit l'export de façon atomique (compatible collecteur textfile de node_exporter)"""
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(self.to_prometheus(), encoding='utf-8')
+        os.replace(tmp, path)
+
+class DataSnapshot:
+    """Instantané en lecture seule de l'état du simulateur à un instant donné"""
+    def __init__(self, data_manager, version, current_time=None):
+        self.version = version
+        self.current_time = current_time or datetime.now()
+        self.channels = data_manager.channel_table()
+        self.global_metrics = dict(data_manager.global_metrics)
+        self.geo_data = dict(data_manager.geo_data)
+        self.platform_data = dict(data_manager.platform_data)
+        self.data_history = data_manager.data_history.freeze()
+        self.aggregates = data_manager.aggregates.freeze()
+
+class SnapshotDiff:
+    """Écarts entre deux instantanés : chaînes (indices), régions et métriques globales modifiées"""
+    __slots__ = ('structure_changed', 'channels', 'regions', 'metrics')
+    
+    def __init__(self, structure_changed, channels, regions, metrics):
+        self.structure_changed = structure_changed
+        self.channels = channels
+        self.regions = regions
+        self.metrics = metrics
+    
+    def __bool__(self):
+        return self.structure_changed or bool(len(self.channels) or self.regions or self.metrics)
+
+def diff_snapshots(previous, current):
+    """Compare deux instantanés ; sans instantané précédent, tout est considéré comme modifié"""
+    table = current.channels
+    if previous is None or previous.channels.names != table.names:
+        return SnapshotDiff(True, np.arange(len(table)), set(current.geo_data), set(current.global_metrics))
+    if previous is current:
+        return SnapshotDiff(False, np.empty(0, dtype=np.int64), set(), set())
+    
+    before = previous.channels
+    changed = ((before.viewers != table.viewers) | (before.peak_today != table.peak_today)
+               | (before.change_pct != table.change_pct) | (before.trend != table.trend)
+               | (before.program != table.program) | (before.share != table.share))
+    regions = {region for region, viewers in current.geo_data.items() if previous.geo_data.get(region) != viewers}
+    metrics = {name for name, value in current.global_metrics.items() if previous.global_metrics.get(name) != value}
+    return SnapshotDiff(False, np.flatnonzero(changed), regions, metrics)
+
+class MarkupCache:
+    """Markup HTML par élément, reconstruit seulement pour les éléments modifiés depuis le dernier rendu"""
+    def __init__(self):
+        self.snapshot = None
+        self.items = {}
+    
+    def diff(self, snapshot):
+        """Écarts entre l'instantané du dernier rendu et `snapshot`"""
+        return diff_snapshots(self.snapshot, snapshot)
+    
+    def refresh(self, snapshot, diff, changed, build):
+        """Reconstruit le markup des clés `changed` et retient `snapshot` comme base du prochain diff"""
+        if diff.structure_changed:
+            self.items.clear()
+        for key in changed:
+            self.items[key] = build(key)
+        self.snapshot = snapshot
+        return self.items
+
+# Budget du cache de rendus partagé, en octets de mémoire retenue (specs des figures, HTML)
+RENDER_CACHE_BUDGET = 32 * 1024 * 1024
+# Mémoire retenue par une go.Figure vide (layout et objets Plotly), en plus de son spec
+SHARED_FIGURE_OVERHEAD = 20 * 1024
+
+def _retained_bytes(value):
+    """Mémoire retenue par un rendu : objets Python parcourus (dict, list, tuple), selon sys.getsizeof"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_retained_bytes(key) + _retained_bytes(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(map(_retained_bytes, value))
+    return size
+
+class SharedFigure(go.Figure):
+    """Figure figée, convertie une fois et remise telle quelle à toutes les sessions
+    
+    st.plotly_chart n'appelle que to_dict() : la copie profonde et la conversion des
+    tableaux NumPy sont faites par la session qui construit la figure, pas par chaque session.
+    L'encodage JSON du spec reste fait par Streamlit, dans chaque session.
+    """
+    def __init__(self, figure):
+        super().__init__()
+        text = figure.to_json(validate=False)
+        # Les figures n'acceptent que leurs propriétés Plotly et les attributs privés
+        self._spec = json.loads(text)
+        # Le cache retient le dict décodé, environ quatre fois la taille du JSON
+        self._nbytes = _retained_bytes(self._spec) + SHARED_FIGURE_OVERHEAD
+    
+    @property
+    def nbytes(self):
+        return self._nbytes
+    
+    def to_dict(self):
+        return self._spec
+
+def _markup_bytes(items):
+    """Mémoire du markup d'une section : une chaîne ou une liste de chaînes par clé
+    
+    Les emojis des cartes font passer les chaînes à 4 octets par caractère : la
+    longueur du texte sous-estimerait la mémoire retenue.
+    """
+    return _retained_bytes(items)
+
+class RenderCache:
+    """Rendus partagés par toutes les sessions du processus, par (version, section, options)
+    
+    La première session qui affiche une section pour un instantané la construit ; les
+    autres reçoivent le même résultat, sans formatage ni conversion de figure. Une seule
+    construction a lieu à la fois : les figures et le markup modèles, mis à jour en place,
+    ne sont jamais modifiés par deux sessions ensemble, et une clé n'est construite qu'une
+    fois. Au-delà de `budget` octets, les entrées les moins récemment lues sont évincées.
+    """
+    def __init__(self, budget=RENDER_CACHE_BUDGET):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.figures = FigureCache()
+        self.markup = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+    
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def get(self, key, build):
+        """Rendu `key`, construit au premier appel par `build()`, qui retourne (rendu, octets)"""
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        with self._build_lock:
+            # Une autre session a pu le construire pendant l'attente
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[0]
+            value, nbytes = build()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (value, nbytes)
+                self.nbytes += nbytes
+                while self.nbytes > self.budget and len(self._entries) > 1:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.nbytes -= evicted
+                    self.evictions += 1
+            return value
+    
+    def markup_cache(self, section):
+        """Markup modèle de la section, à n'utiliser que dans une construction"""
+        cache = self.markup.get(section)
+        if cache is None:
+            cache = self.markup[section] = MarkupCache()
+        return cache
+    
+    def clear(self):
+        """Oublie tous les rendus (versions d'un autre producteur, par exemple)"""
+        with self._build_lock, self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.figures = FigureCache()
+            self.markup = {}
+    
+    def stats(self):
+        with self._lock:
+            return {'entrées': len(self._entries), 'octets': self.nbytes, 'budget': self.budget,
+                    'hits': self.hits, 'misses': self.misses, 'évictions': self.evictions}
+
+class SharedDataStore:
+    """Magasin de données unique, partagé par toutes les sessions du processus"""
+    def __init__(self, data_manager=None):
+        self._lock = threading.Lock()
+        self.data_manager = data_manager if data_manager is not None else FranceTVAllChannels()
+        self.metrics = Instrumentation()
+        self.renders = RenderCache()
+        self.publisher = None
+        self.version = 0
+        self._snapshot = DataSnapshot(self.data_manager, self.version)
+    
+    def tick(self):
+        """Avance la simulation d'un pas et publie un nouvel instantané"""
+        with self._lock:
+            if self.data_manager.update_live_data() is False:  # Rien de neuf : on garde l'instantané publié
+                return self._snapshot
+            self.version += 1
+            self._snapshot = DataSnapshot(self.data_manager, self.version)
+            if self.publisher is not None:
+                self.publisher.publish(self.data_manager, self.version, self._snapshot.current_time)
+            return self._snapshot
+    
+    def snapshot(self):
+        """Retourne le dernier instantané publié, sans prendre le verrou"""
+        return self._snapshot
+
+class DataScheduler(threading.Thread):
+    """Fait avancer la simulation à intervalle fixe, indépendamment des pages ouvertes"""
+    def __init__(self, store, interval=DATA_TICK_INTERVAL, metrics_file=None):
+        super().__init__(name="francetv-data-scheduler", daemon=True)
+        self.store = store
+        self.interval = interval
+        self.metrics_file = metrics_file
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        """Boucle de cadencement : un pas de simulation par intervalle"""
+        metrics = self.store.metrics
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            metrics.observe('tick_lateness_seconds', max(started - next_tick, 0.0))
+            try:
+                self.store.tick()
+            except Exception as exc:  # Un pas raté ne doit pas arrêter le cadencement
+                warnings.warn(f"Échec de la mise à jour des données : {exc!r}")
+            metrics.observe('tick_seconds', time.monotonic() - started)
             
-            # Mise à jour tendance et changement
-            trend = self.get_trend(change, current_viewers)
-            self.channels_data[channel]['trend'] = trend
-            self.channels_data[channel]['change'] = f"{change/current_viewers*100:+.1f}%"
+            if self.metrics_file:
+                try:
+                    metrics.write_prometheus(self.metrics_file)
+                except OSError as exc:
+                    warnings.warn(f"Échec de l'export des mesures : {exc!r}")
             
-            # Mise à jour pic du jour
-            if new_viewers > self.channels_data[channel]['peak_today']:
-                self.channels_data[channel]['peak_today'] = new_viewers
-        
-        # Mise à jour métriques globales
-        self.global_metrics['total_viewers'] = total_viewers + random.randint(500000, 800000)
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:  # En retard : on saute les pas manqués plutôt que de rattraper
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+    
+    def stop(self):
+        """Demande l'arrêt du cadencement"""
+        self._stop_event.set()
+
+# En-tête du segment partagé : emplacements int64, puis métadonnées JSON, puis tableaux
+SHARED_MAGIC = 0x46545644415348  # « FTVDASH »
+HEADER_SLOTS = 64
+HDR_MAGIC, HDR_SEQ, HDR_VERSION, HDR_META_LEN, HDR_PUBLISHED, HDR_RING_HEAD, HDR_RING_LENGTH = range(7)
+HDR_LEVELS = 8  # (head, length, bucket) par niveau agrégé
+SHARED_ALIGN = 64
+# Attente maximale d'un état cohérent côté lecteur (secondes), et essais avant de céder le processeur
+SHARED_READ_TIMEOUT = 0.5
+SHARED_READ_SPINS = 100
+
+class MappedArena:
+    """Allocateur séquentiel de tableaux NumPy dans un tampon partagé
+    
+    Producteur et lecteurs effectuent la même suite d'allocations : ils obtiennent des
+    vues identiques sur le même segment. Sans tampon, l'arène ne fait que mesurer la
+    taille nécessaire.
+    """
+    def __init__(self, buffer=None, offset=0):
+        self.buffer = buffer
+        self.offset = offset
+    
+    def allocate(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self.offset = -(-self.offset // SHARED_ALIGN) * SHARED_ALIGN
+        if self.buffer is None:
+            array = np.broadcast_to(np.zeros((), dtype), shape)
+        else:
+            array = np.ndarray(shape, dtype, buffer=self.buffer, offset=self.offset)
+        self.offset += int(np.prod(shape)) * dtype.itemsize
+        return array
+
+def _shared_layout(arena, meta):
+    """Tableaux de l'état courant et historique, dans l'ordre commun aux deux côtés"""
+    count = len(meta['names'])
+    regions = len(meta['regions'])
+    arrays = {
+        'viewers': arena.allocate(count, np.int64),
+        'peak_today': arena.allocate(count, np.int64),
+        'change_pct': arena.allocate(count, np.float64),
+        'trend': arena.allocate(count, np.int8),
+        'program': arena.allocate(count, np.int16),
+        'share': arena.allocate(count, np.float64),
+        'metrics': arena.allocate(len(meta['metrics']), np.float64),
+        'geo': arena.allocate(regions, np.float64),
+        'platforms': arena.allocate(len(meta['platforms']), np.float64),
+        'aggregates': arena.allocate((len(AGGREGATE_FIELDS), len(meta['history_keys'])), np.float64),
+        'order': arena.allocate(count, np.int64),
+        'ranks': arena.allocate(count, np.int64),
+        'region_order': arena.allocate(regions, np.int64),
+        'region_share': arena.allocate(regions, np.float64)
+    }
+    ring = HistoryRing(meta['history_keys'], capacity=meta['capacity'],
+                       rollup_levels=[tuple(level) for level in meta['rollup_levels']],
+                       allocate=arena.allocate)
+    return arrays, ring
+
+def _typed_values(values, integer_flags):
+    """Rétablit les entiers stockés en float64 dans le segment"""
+    return [int(value) if is_int else float(value) for value, is_int in zip(values.tolist(), integer_flags)]
+
+class SharedMemoryPublisher:
+    """Côté producteur : écrit l'état courant et l'historique dans un fichier projeté en mémoire
+    
+    Chaque publication est encadrée par un seqlock (compteur impair pendant l'écriture).
+    L'historique est écrit directement dans le segment par le HistoryRing du modèle ;
+    seuls les tableaux de l'état courant et les positions des anneaux sont recopiés.
+    """
+    def __init__(self, model, path):
+        self.path = Path(path)
+        self.meta = {
+            'names': list(model.engine.names),
+            'category': model.category_codes.tolist(),
+            'color': model.color_codes.tolist(),
+            'categories': list(model.categories.labels),
+            'programs': list(model.programs.labels),
+            'colors': list(model.colors.labels),
+            'metrics': list(model.global_metrics),
+            'metrics_int': [isinstance(v, int) for v in model.global_metrics.values()],
+            'regions': list(model.geo_data),
+            'regions_int': [isinstance(v, int) for v in model.geo_data.values()],
+            'platforms': list(model.platform_data),
+            'platforms_int': [isinstance(v, int) for v in model.platform_data.values()],
+            'history_keys': list(model.data_history.keys),
+            'capacity': model.data_history.capacity,
+            'rollup_levels': [[level.seconds, level.capacity] for level in model.data_history.rollups]
+        }
+        meta_bytes = json.dumps(self.meta, ensure_ascii=False).encode('utf-8')
+        data_offset = HEADER_SLOTS * 8 + len(meta_bytes)
         
-        # Digital (variations plus importantes)
-        digital_change = random.randint(-1000000, 1500000)
-        self.global_metrics['digital_traffic'] = max(
-            self.global_metrics['digital_traffic'] + digital_change, 
-            8000000
-        )
+        sizing = MappedArena(None, data_offset)
+        _shared_layout(sizing, self.meta)
         
-        # Mise à jour historique
-        self.update_history_data()
+        # Construit le segment sous un nom temporaire, puis le renomme atomiquement
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        self.buffer = np.memmap(tmp, dtype=np.uint8, mode='w+', shape=(sizing.offset,))
+        self.header = np.ndarray((HEADER_SLOTS,), np.int64, buffer=self.buffer, offset=0)
+        self.buffer[HEADER_SLOTS * 8:data_offset] = np.frombuffer(meta_bytes, dtype=np.uint8)
+        self.arrays, ring = _shared_layout(MappedArena(self.buffer, data_offset), self.meta)
         
-        # Rotation occasionnelle des programmes
-        if random.random() < 0.15:
-            self.rotate_programs()
-    
-    def get_trend(self, change, current):
-        """Détermine la tendance"""
-        if abs(change/current) < 0.005:  # Moins de 0.5% de changement
-            return 'stable'
-        return 'up' if change > 0 else 'down'
-    
-    def rotate_programs(self):
-        """Change occasionnellement les programmes"""
-        programs = {
-            'France 2': ['Journal de 13h', 'Feuilleton', 'Débat politique', 'Magazine culturel', 'Sport'],
-            'France 3': ['Magazines régionaux', 'Documentaire régional', 'Jeu', 'Information locale'],
-            'France 4': ['Jeunesse et divertissement', 'Série animée', 'Divertissement', 'Rediffusion'],
-            'France 5': ['Documentaire scientifique', 'Émission santé', 'Histoire', 'Environnement'],
-            'France Info': ['Info continue', 'Débat d\'actualité', 'Reportage', 'Interview'],
-            'Culturebox': ['Spectacle vivant', 'Concert', 'Théâtre', 'Opéra'],
-            'France Ô': ['Magazine Outre-Mer', 'Documentaire DOM-TOM', 'Culture outre-mer', 'Débats']
-        }
+        # L'historique existant passe dans le segment ; le modèle y écrit désormais directement
+        window = model.data_history.freeze()
+        if len(window):
+            ring.extend(window['timestamp'], np.stack([window[key] for key in ring.keys]))
+        model.data_history = ring
+        self.ring = ring
         
-        for channel, program_list in programs.items():
-            if random.random() < 0.3:  # 30% de chance par chaîne
-                self.channels_data[channel]['program'] = random.choice(program_list)
+        self.header[HDR_META_LEN] = len(meta_bytes)
+        self.header[HDR_MAGIC] = SHARED_MAGIC
+        self.publish(model, 0, datetime.now())
+        os.replace(tmp, self.path)
     
-    def update_history_data(self):
-        """Met à jour l'historique"""
-        current_time = datetime.now()
+    def publish(self, model, version, published_at):
+        """Recopie l'état courant sous seqlock"""
+        if len(model.programs.labels) != len(self.meta['programs']):
+            warnings.warn("Nouveaux programmes hors catalogue : libellés non partagés avec les lecteurs")
+        header, arrays, engine, aggregates = self.header, self.arrays, model.engine, model.aggregates
+        header[HDR_SEQ] += 1  # Impair : écriture en cours
+        try:
+            arrays['viewers'][:] = engine.viewers
+            arrays['peak_today'][:] = aggregates.peak_today()
+            arrays['change_pct'][:] = engine.change_pct
+            arrays['trend'][:] = engine.trend
+            arrays['program'][:] = model.program_codes
+            arrays['share'][:] = aggregates.values[AGGREGATE_FIELD_INDEX['market_share'], :aggregates.channel_count]
+            arrays['metrics'][:] = [model.global_metrics[key] for key in self.meta['metrics']]
+            arrays['geo'][:] = [model.geo_data[key] for key in self.meta['regions']]
+            arrays['platforms'][:] = [model.platform_data[key] for key in self.meta['platforms']]
+            arrays['aggregates'][:] = aggregates.values
+            arrays['order'][:] = aggregates.order
+            arrays['ranks'][:] = aggregates.ranks
+            arrays['region_order'][:] = aggregates.region_order
+            arrays['region_share'][:] = aggregates.region_share
+            header[HDR_RING_HEAD] = self.ring.head
+            header[HDR_RING_LENGTH] = self.ring.length
+            for i, level in enumerate(self.ring.rollups):
+                slot = HDR_LEVELS + 3 * i
+                header[slot:slot + 3] = (level.head, level.length, -1 if level.bucket is None else level.bucket)
+            # Version écrite en dernier : une publication interrompue n'est pas relue par les lecteurs
+            header[HDR_VERSION] = version
+            header[HDR_PUBLISHED] = int(published_at.timestamp() * 1000)
+        finally:
+            header[HDR_SEQ] += 1  # Pair : état cohérent, même après une erreur
+
+class _SharedStateView:
+    """État lu dans le segment, présenté comme un FranceTVAllChannels à DataSnapshot"""
+    def __init__(self, channel_table, global_metrics, geo_data, platform_data, data_history, aggregates):
+        self._channel_table = channel_table
+        self.global_metrics = global_metrics
+        self.geo_data = geo_data
+        self.platform_data = platform_data
+        self.data_history = data_history
+        self.aggregates = aggregates
+    
+    def channel_table(self):
+        return self._channel_table
+
+class SharedMemoryStore:
+    """Côté dashboard : lit l'état publié par un producteur, sans simulation locale
+    
+    Même interface que SharedDataStore. L'historique est lu sans copie dans le segment ;
+    seul l'état courant (quelques tableaux de la taille du nombre de chaînes) est copié.
+    Un producteur redémarré (nouveau fichier) est détecté et relu.
+    """
+    def __init__(self, path, reattach_interval=1.0):
+        self.path = Path(path)
+        self.reattach_interval = reattach_interval
+        self.metrics = Instrumentation()
+        self.renders = RenderCache()
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._attach()
+    
+    def _attach(self):
+        buffer = np.memmap(self.path, dtype=np.uint8, mode='r')
+        header = np.ndarray((HEADER_SLOTS,), np.int64, buffer=buffer, offset=0)
+        if header[HDR_MAGIC] != SHARED_MAGIC:
+            raise ValueError(f"{self.path} n'est pas un segment de dashboard France Télévisions")
+        meta_len = int(header[HDR_META_LEN])
+        meta = json.loads(bytes(buffer[HEADER_SLOTS * 8:HEADER_SLOTS * 8 + meta_len]).decode('utf-8'))
+        self.arrays, self.ring = _shared_layout(MappedArena(buffer, HEADER_SLOTS * 8 + meta_len), meta)
+        self.meta = meta
+        self.header = header
+        self.buffer = buffer
+        self._inode = os.stat(self.path).st_ino
+        self._checked = time.monotonic()
+        self._snapshot = None
+        self._stalled = None
+        # Un producteur redémarré reprend ses versions à zéro : les rendus déjà faits ne valent plus
+        self.renders.clear()
         
-        self.data_history['timestamp'].append(current_time)
+        names = tuple(meta['names'])
+        self._static = {
+            'names': names,
+            'index': {name: i for i, name in enumerate(names)},
+            'history_keys': tuple(meta['history_keys']),
+            'category': np.array(meta['category'], dtype=np.int16),
+            'color': np.array(meta['color'], dtype=np.int16),
+            'categories': Vocabulary(meta['categories']),
+            'programs': Vocabulary(meta['programs']),
+            'colors': Vocabulary(meta['colors'])
+        }
+    
+    def _check_producer(self, force=False):
+        """Rattache le segment si le producteur l'a recréé (au plus une fois par intervalle,
+        sauf avec `force`) ; retourne True après un rattachement"""
+        now = time.monotonic()
+        if not force and now - self._checked < self.reattach_interval:
+            return False
+        self._checked = now
+        try:
+            if os.stat(self.path).st_ino != self._inode:
+                self._attach()
+                return True
+        except (OSError, ValueError) as exc:
+            warnings.warn(f"Segment partagé indisponible : {exc!r}")
+        return False
+    
+    @property
+    def version(self):
+        return int(self.header[HDR_VERSION])
+    
+    def _read(self):
+        """Copie cohérente de l'état courant : relit tant qu'une écriture est en cours
         
-        for channel in self.channels_data:
-            self.data_history[channel].append(self.channels_data[channel]['viewers'])
+        L'attente est bornée à SHARED_READ_TIMEOUT : un producteur arrêté en pleine écriture
+        ne bloque pas les sessions, qui gardent le dernier instantané lu. Un producteur
+        redémarré pendant l'attente est rattaché.
+        """
+        header, arrays, static = self.header, self.arrays, self._static
+        deadline = time.monotonic() + SHARED_READ_TIMEOUT
+        attempts = 0
+        while True:
+            seq = int(header[HDR_SEQ])
+            if seq % 2:
+                attempts += 1
+                if attempts < SHARED_READ_SPINS:
+                    time.sleep(0)
+                    continue
+                if self._check_producer(force=True):
+                    header, arrays, static = self.header, self.arrays, self._static
+                    continue
+                if seq == self._stalled or time.monotonic() > deadline:
+                    if self._snapshot is None:
+                        raise TimeoutError(f"{self.path} : aucun état cohérent publié")
+                    if seq != self._stalled:
+                        warnings.warn(f"{self.path} : écriture du producteur inachevée, dernier instantané conservé")
+                    # Même écriture toujours inachevée au prochain appel : pas de nouvelle attente
+                    self._stalled = seq
+                    return self._snapshot
+                time.sleep(0.001)
+                continue
+            table = ChannelTable(
+                static['names'], static['index'], arrays['viewers'].copy(), arrays['peak_today'].copy(),
+                arrays['change_pct'].copy(), arrays['trend'].copy(), arrays['share'].copy(), static['category'],
+                arrays['program'].copy(), static['color'], static['categories'], static['programs'],
+                static['colors']
+            )
+            metrics = arrays['metrics'].copy()
+            geo = arrays['geo'].copy()
+            platforms = arrays['platforms'].copy()
+            aggregates = AggregateView(
+                static['history_keys'], arrays['aggregates'].copy(), arrays['order'].copy(),
+                arrays['ranks'].copy(), arrays['region_order'].copy(), arrays['region_share'].copy()
+            )
+            state = header.copy()
+            if int(header[HDR_SEQ]) == seq:
+                break
         
-        self.data_history['total'].append(self.global_metrics['total_viewers'])
-        self.data_history['digital'].append(self.global_metrics['digital_traffic'])
+        ring = self.ring
+        ring.head, ring.length = int(state[HDR_RING_HEAD]), int(state[HDR_RING_LENGTH])
+        for i, level in enumerate(ring.rollups):
+            head, length, bucket = state[HDR_LEVELS + 3 * i:HDR_LEVELS + 3 * i + 3].tolist()
+            level.head, level.length, level.bucket = head, length, None if bucket < 0 else bucket
         
-        # Garde seulement les 60 dernières valeurs
-        for key in self.data_history:
-            if len(self.data_history[key]) > 60:
-                self.data_history[key] = self.data_history[key][-60:]
+        meta = self.meta
+        view = _SharedStateView(
+            table,
+            dict(zip(meta['metrics'], _typed_values(metrics, meta['metrics_int']))),
+            dict(zip(meta['regions'], _typed_values(geo, meta['regions_int']))),
+            dict(zip(meta['platforms'], _typed_values(platforms, meta['platforms_int']))),
+            ring, aggregates
+        )
+        published = datetime.fromtimestamp(state[HDR_PUBLISHED] / 1000)
+        return DataSnapshot(view, int(state[HDR_VERSION]), current_time=published)
+    
+    def snapshot(self):
+        """Dernier état publié par le producteur ; relu seulement si sa version a changé"""
+        with self._lock:
+            self._check_producer()
+            if self._snapshot is None or self._snapshot.version != self.version:
+                self._snapshot = self._read()
+            return self._snapshot
+    
+    def tick(self):
+        """Pas de simulation locale : le producteur fait avancer les données"""
+        return self.snapshot()
 
-class AllChannelsDashboard:
+def build_source(replay=None, speed=1.0, ingest=None, overflow='block'):
+    """Source d'audience choisie en ligne de commande ; None pour la simulation"""
+    if ingest:
+        return FeedIngestSource(ingest, overflow=overflow).start()
+    return FileReplaySource(replay, speed=speed) if replay else None
+
+def run_producer(path, replay=None, speed=1.0, metrics_file=None, interval=DATA_TICK_INTERVAL, log_dir=None,
+                 ingest=None, overflow='block', seed=None, start=SIMULATION_START, regional_grid=False):
+    """Processus producteur unique : simule (ou rejoue, ou ingère) et publie dans le segment `path`"""
+    source = build_source(replay, speed, ingest, overflow)
+    store = SharedDataStore(FranceTVAllChannels(
+        extra_channels=build_regional_grid() if regional_grid else None,
+        source=source, log_dir=log_dir, seed=seed, start=start
+    ))
+    if ingest:
+        source.metrics = store.metrics
+    store.publisher = SharedMemoryPublisher(store.data_manager, path)
+    print(f"Producteur actif : {path} (un pas toutes les {interval}s)", flush=True)
+    try:
+        DataScheduler(store, interval=interval, metrics_file=metrics_file).run()
+    except KeyboardInterrupt:
+        pass
+
+@st.cache_resource
+def get_shared_store(replay=None, speed=1.0, metrics_file=None, shared=None, log_dir=None, ingest=None,
+                     overflow='block', seed=None, start=SIMULATION_START, regional_grid=False):
+    """Construit le magasin partagé et démarre son cadenceur une seule fois par processus
+    
+    Avec `replay`, les audiences viennent du fichier rejoué plutôt que du simulateur ;
+    avec `metrics_file`, les mesures sont exportées au format Prometheus à chaque pas ;
+    avec `shared`, le processus lit le segment d'un producteur au lieu de simuler ;
+    avec `log_dir`, chaque pas est journalisé et l'historique y est rechargé au démarrage ;
+    avec `ingest`, les audiences viennent des flux reçus sur cette adresse ;
+    avec `seed`, la simulation est reproductible, sur une horloge simulée partant de `start` ;
+    avec `regional_grid`, les déclinaisons régionales, La 1ère et FAST s'ajoutent aux chaînes nationales.
+    """
+    if shared:
+        store = SharedMemoryStore(shared)
+    else:
+        source = build_source(replay, speed, ingest, overflow)
+        store = SharedDataStore(FranceTVAllChannels(
+            extra_channels=build_regional_grid() if regional_grid else None,
+            source=source, log_dir=log_dir, seed=seed, start=start
+        ))
+        if ingest:
+            source.metrics = store.metrics
+        store.scheduler = DataScheduler(store, metrics_file=metrics_file)
+        store.scheduler.start()
+    return store
+
+class FigureCache:
+    """Figures Plotly construites une fois par structure, dont seules les données changent
+    
+    La mise en page et les traces sont conservées tant que la structure (liste des
+    chaînes, des régions...) ne change pas ; chaque rafraîchissement ne remplace que
+    les valeurs des traces. Associées à une clé de graphique stable, les figures sont
+    mises à jour côté navigateur par Plotly.react au lieu d'être recréées.
+    """
     def __init__(self):
-        self.data_manager = FranceTVAllChannels()
+        self._figures = {}
+    
+    def get(self, name, structure, build):
+        """Retourne la figure `name`, reconstruite par `build(structure)` si la structure a changé"""
+        entry = self._figures.get(name)
+        if entry is None or entry[0] != structure:
+            entry = (structure, build(structure))
+            self._figures[name] = entry
+        return entry[1]
+
+class AllChannelsDashboard:
+    # Chaînes suivies par le graphique d'évolution
+    MAIN_CHANNELS = ('France 2', 'France 3', 'France 5')
+    
+    def __init__(self, store=None):
+        self.store = store if store is not None else get_shared_store()
+        self.data_manager = self.store.snapshot()
         self.last_update = datetime.now()
+        # Figures et markup partagés entre sessions : construits une fois par instantané
+        self.renders = self.store.renders
+    
+    def shared_figure(self, section, options, structure, build, update):
+        """Figure de la section pour l'instantané courant, construite une fois pour toutes les sessions
+        
+        `options` regroupe les choix d'affichage dont dépend la figure ; `update(fig)`
+        reporte les données de l'instantané dans la figure modèle.
+        """
+        def render():
+            fig = self.renders.figures.get((section, options), structure, build)
+            update(fig)
+            shared = SharedFigure(fig)
+            return shared, shared.nbytes
+        return self.renders.get((self.data_manager.version, section, options), render)
+    
+    def shared_markup(self, section, changed, build):
+        """Markup de la section pour l'instantané courant, construit une fois pour toutes les sessions
+        
+        `changed(diff)` liste les clés à reconstruire par `build(key)` depuis le dernier
+        instantané construit ; les autres clés reprennent le markup précédent.
+        """
+        snapshot = self.data_manager
+        
+        def render():
+            cache = self.renders.markup_cache(section)
+            diff = cache.diff(snapshot)
+            # Copie : le markup modèle de la section continue d'évoluer
+            items = dict(cache.refresh(snapshot, diff, changed(diff), build))
+            return items, _markup_bytes(items)
+        return self.renders.get((snapshot.version, section, ()), render)
         
     def display_header(self):
         """Affiche l'en-tête du dashboard"""
         col1, col2, col3 = st.columns([1, 2, 1])
         
         with col1:
-            st.image("https://upload.wikimedia.org/wikipedia/fr/thumb/3/3f/France_T%C3%A9l%C3%A9visions_2018.svg/1200px-France_T%C3%A9l%C3%A9visions_2018.svg.png", 
-                    width=150)
+            st.image(load_logo(), width=150)
         
         with col2:
             st.markdown('<h1 class="main-header">FRANCE TÉLÉVISIONS LIVE</h1>', unsafe_allow_html=True)
             st.markdown('<div class="live-badge">📡 TOUTES LES CHAÎNES - DONNÉES TEMPS RÉEL</div>', unsafe_allow_html=True)
         
         with col3:
-            current_time = datetime.now().strftime('%H:%M:%S')
-            st.markdown(f"**🕐 {current_time}**")
-            st.markdown(f"**📅 {datetime.now().strftime('%d/%m/%Y')}**")
-            st.markdown(f"**👥 {self.data_manager.global_metrics['total_viewers']:,} téléspectateurs**".replace(',', ' '))
+            self.live_fragment('header_counters', LIVE_REFRESH, self.display_header_counters)
+    
+    def display_header_counters(self):
+        """Horloge et audience totale de l'en-tête"""
+        current_time = datetime.now().strftime('%H:%M:%S')
+        st.markdown(f"**🕐 {current_time}**")
+        st.markdown(f"**📅 {datetime.now().strftime('%d/%m/%Y')}**")
+        st.markdown(f"**👥 {self.data_manager.global_metrics['total_viewers']:,} téléspectateurs**".replace(',', ' '))
     
     def display_global_metrics(self):
         """Affiche les métriques globales"""
@@ -375,133 +2793,194 @@ class AllChannelsDashboard:
         # Crée 4 colonnes pour afficher les chaînes
         cols = st.columns(4)
         
-        for idx, (channel, data) in enumerate(self.data_manager.channels_data.items()):
+        cards = self.channel_cards()
+        for idx, channel in enumerate(self.data_manager.channels.names):
             with cols[idx % 4]:
-                trend_icon = "📈" if data['trend'] == 'up' else "📉" if data['trend'] == 'down' else "➡️"
-                trend_class = "positive" if data['trend'] == 'up' else "negative" if data['trend'] == 'down' else "neutral"
-                
-                st.markdown(f"""
-                <div class="channel-card">
-                    <h4>{channel} {trend_icon}</h4>
-                    <div class="metric-large">{data['viewers']:,}</div>
-                    <p><span class="{trend_class}">{data['change']}</span> • {data['share']}% part</p>
-                    <p><small>📺 {data['program']}</small></p>
-                    <p><small>🏆 Pic: {data['peak_today']:,}</small></p>
-                </div>
-                """.replace(',', ' '), unsafe_allow_html=True)
-    
-    def create_live_charts(self):
-        """Crée les graphiques en temps réel"""
-        tab1, tab2, tab3, tab4 = st.tabs(["📈 Évolution Audience", "📊 Comparaison Chaînes", "🗺️ Carte Audience", "📱 Plateformes"])
-        
-        with tab1:
-            self.create_evolution_chart()
-        
-        with tab2:
-            self.create_comparison_chart()
-        
-        with tab3:
-            self.create_geo_chart()
-        
-        with tab4:
-            self.create_platforms_chart()
+                st.markdown(cards[channel], unsafe_allow_html=True)
+    
+    def channel_cards(self):
+        """Cartes partagées de la grille : seules les chaînes modifiées depuis le dernier rendu sont reconstruites"""
+        table = self.data_manager.channels
+        return self.shared_markup('channels_grid', lambda diff: [table.names[i] for i in diff.channels.tolist()],
+                                  self.build_channel_card)
+    
+    def build_channel_card(self, channel):
+        """Carte HTML d'une chaîne"""
+        data = self.data_manager.channels.record(channel)
+        trend_icon, trend_class = TREND_DISPLAY[data['trend']]
+        
+        return f"""
+        <div class="channel-card">
+            <h4>{channel} {trend_icon}</h4>
+            <div class="metric-large">{data['viewers']:,}</div>
+            <p><span class="{trend_class}">{data['change_pct']:+.1f}%</span> • {data['share']:.1f}% part</p>
+            <p><small>📺 {data['program']}</small></p>
+            <p><small>🏆 Pic: {data['peak_today']:,}</small></p>
+        </div>
+        """.replace(',', ' ')
+    
+    def create_live_charts(self, refresh_rate=CHART_REFRESH):
+        """Crée les graphiques en temps réel
+        
+        Seul l'onglet affiché est calculé : changer d'onglet relance la page, et les
+        onglets masqués ne coûtent rien côté serveur. Évolution et comparaison se
+        rafraîchissent toutes les `refresh_rate` secondes, carte et plateformes à SLOW_REFRESH.
+        """
+        tabs = st.tabs(
+            ["📈 Évolution Audience", "📊 Comparaison Chaînes", "🗺️ Carte Audience", "📱 Plateformes"],
+            key='live_charts_tab', on_change='rerun'
+        )
+        sections = [
+            ('tab_evolution', refresh_rate, self.create_evolution_chart),
+            ('tab_comparison', refresh_rate, self.create_comparison_chart),
+            ('tab_geo', SLOW_REFRESH, self.create_geo_chart),
+            ('tab_platforms', SLOW_REFRESH, self.create_platforms_chart)
+        ]
+        
+        for tab, (section, cadence, render) in zip(tabs, sections):
+            with tab:
+                if tab.open is False:  # Onglet masqué
+                    continue
+                self.live_fragment(section, cadence, render)
     
     def create_evolution_chart(self):
         """Graphique d'évolution temporelle"""
-        fig = go.Figure()
+        window = st.radio("Fenêtre", list(HISTORY_WINDOWS), horizontal=True, key='evolution_window',
+                          label_visibility='collapsed')
+        st.plotly_chart(self.evolution_figure(window), use_container_width=True, key='evolution_chart')
+    
+    def evolution_figure(self, window):
+        """Figure partagée de l'évolution sur la fenêtre `window`"""
+        main_channels = self.MAIN_CHANNELS
+        history = self.data_manager.data_history
+        
+        def update(fig):
+            with fig.batch_update():
+                for trace, channel in zip(fig.data, main_channels):
+                    trace.x, trace.y = history.downsampled(channel, HISTORY_WINDOWS[window])
         
-        # Ajoute les 3 chaînes principales
-        main_channels = ['France 2', 'France 3', 'France 5']
+        return self.shared_figure('evolution', window, (main_channels, window), self.build_evolution_figure, update)
+    
+    def build_evolution_figure(self, structure):
+        """Structure du graphique d'évolution : une courbe par chaîne principale"""
+        main_channels, window = structure
+        fig = go.Figure()
         colors = ['#0055A4', '#EF4135', '#8A2BE2']
         
         for i, channel in enumerate(main_channels):
             fig.add_trace(go.Scatter(
-                x=self.data_manager.data_history['timestamp'],
-                y=self.data_manager.data_history[channel],
                 name=channel,
                 line=dict(color=colors[i], width=3),
                 mode='lines'
             ))
         
         fig.update_layout(
-            title="Évolution de l'Audience - 60 Dernières Minutes",
+            title=f"Évolution de l'Audience - {window}",
             xaxis_title="Heure",
             yaxis_title="Téléspectateurs",
             height=400,
             showlegend=True
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
     def create_comparison_chart(self):
         """Graphique de comparaison entre chaînes"""
-        channels = list(self.data_manager.channels_data.keys())
-        viewers = [self.data_manager.channels_data[channel]['viewers'] for channel in channels]
-        colors = [self.data_manager.channels_data[channel]['color'] for channel in channels]
+        st.plotly_chart(self.comparison_figure(), use_container_width=True, key='comparison_chart')
+    
+    def comparison_figure(self):
+        """Figure partagée de la comparaison entre chaînes"""
+        table = self.data_manager.channels
+        
+        def update(fig):
+            fig.data[0].y = table.viewers
         
-        fig = px.bar(
-            x=channels, 
-            y=viewers,
+        return self.shared_figure('comparison', (), table.names, self.build_comparison_figure, update)
+    
+    def build_comparison_figure(self, channels):
+        """Structure du graphique de comparaison : une seule trace de barres colorées par chaîne"""
+        fig = go.Figure(go.Bar(
+            x=list(channels),
+            marker_color=self.data_manager.channels.color_labels(),
+            hovertemplate="Chaîne=%{x}<br>Téléspectateurs=%{y}<extra></extra>"
+        ))
+        
+        fig.update_layout(
             title="Audience Actuelle par Chaîne",
-            labels={'x': 'Chaîne', 'y': 'Téléspectateurs'},
-            color=channels,
-            color_discrete_sequence=colors
+            xaxis_title="Chaîne",
+            yaxis_title="Téléspectateurs",
+            height=400,
+            showlegend=False
         )
-        
-        fig.update_layout(height=400, showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
     def create_geo_chart(self):
         """Carte géographique de l'audience"""
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            regions_data = {
-                'Région': list(self.data_manager.geo_data.keys()),
-                'Téléspectateurs': list(self.data_manager.geo_data.values())
-            }
-            df_regions = pd.DataFrame(regions_data)
-            
-            fig = px.choropleth(
-                df_regions,
-                locations='Région',
-                locationmode='country names',
-                color='Téléspectateurs',
-                hover_name='Région',
-                title="Audience par Région - France Télévisions",
-                color_continuous_scale='Blues'
-            )
-            
-            fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(self.geo_figure(geo_tolerance()), use_container_width=True, key='geo_chart')
         
         with col2:
             st.subheader("🏆 Top 5 Régions")
-            top_regions = sorted(self.data_manager.geo_data.items(), key=lambda x: x[1], reverse=True)[:5]
-            
-            for i, (region, viewers) in enumerate(top_regions, 1):
-                percentage = (viewers / sum(self.data_manager.geo_data.values())) * 100
-                st.markdown(f"""
-                <div class="channel-card">
-                    <h4>#{i} {region}</h4>
-                    <div class="metric-large">{viewers:,}</div>
-                    <p>{percentage:.1f}% du total</p>
-                </div>
-                """.replace(',', ' '), unsafe_allow_html=True)
+            for card in self.top_regions_cards():
+                st.markdown(card, unsafe_allow_html=True)
+    
+    def geo_figure(self, tolerance):
+        """Figure partagée de la carte, au niveau de simplification `tolerance`"""
+        geo_data = self.data_manager.geo_data
+        
+        def update(fig):
+            fig.data[0].z = list(geo_data.values())
+        
+        return self.shared_figure('geo', tolerance, (tuple(geo_data), tolerance), self.build_geo_figure, update)
+    
+    def top_regions_cards(self):
+        """Cartes partagées du top 5 : le classement n'est recalculé que si une région a changé"""
+        return self.shared_markup('top_regions', lambda diff: ['top5'] if diff.regions else [],
+                                  lambda key: self.build_top_regions())['top5']
+    
+    def build_top_regions(self):
+        """Cartes HTML des 5 régions les plus regardées"""
+        # Classement et parts tenus à jour par les agrégats à chaque pas
+        aggregates = self.data_manager.aggregates
+        regions = list(self.data_manager.geo_data.items())
+        
+        cards = []
+        for i, index in enumerate(aggregates.region_order[:5].tolist(), 1):
+            region, viewers = regions[index]
+            percentage = aggregates.region_share[index]
+            cards.append(f"""
+            <div class="channel-card">
+                <h4>#{i} {region}</h4>
+                <div class="metric-large">{viewers:,}</div>
+                <p>{percentage:.1f}% du total</p>
+            </div>
+            """.replace(',', ' '))
+        return cards
+    
+    def build_geo_figure(self, structure):
+        """Structure de la carte : fond de carte des régions et échelle de couleurs, sans les valeurs"""
+        regions, tolerance = structure
+        fig = go.Figure(go.Choropleth(
+            geojson=region_geojson_source(tolerance),
+            featureidkey='properties.nom',
+            locations=list(regions),
+            hovertemplate="%{location}<br>Téléspectateurs=%{z:,}<extra></extra>",
+            colorscale='Blues',
+            colorbar_title='Téléspectateurs',
+            marker_line_color='white'
+        ))
+        fig.update_geos(fitbounds='locations', visible=False, projection_type='mercator')
+        fig.update_layout(title="Audience par Région - France Télévisions", height=GEO_MAP_HEIGHT,
+                          margin=dict(l=0, r=0, t=40, b=0))
+        return fig
     
     def create_platforms_chart(self):
         """Graphique des plateformes de visionnage"""
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = px.pie(
-                values=list(self.data_manager.platform_data.values()),
-                names=list(self.data_manager.platform_data.keys()),
-                title="Répartition par Plateforme",
-                color_discrete_sequence=px.colors.sequential.Blues_r
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(self.platforms_figure(), use_container_width=True, key='platforms_chart')
         
         with col2:
             st.subheader("📊 Analyse Digital")
@@ -517,42 +2996,124 @@ class AllChannelsDashboard:
             for metric, value in digital_metrics.items():
                 st.metric(label=metric, value=value)
     
+    def platforms_figure(self):
+        """Figure partagée des plateformes"""
+        platform_data = self.data_manager.platform_data
+        
+        def update(fig):
+            fig.data[0].values = list(platform_data.values())
+        
+        return self.shared_figure('platforms', (), tuple(platform_data), self.build_platforms_figure, update)
+    
+    def build_platforms_figure(self, platforms):
+        """Structure du camembert des plateformes, sans les valeurs"""
+        from plotly.colors import sequential
+        
+        colors = sequential.Blues_r
+        fig = go.Figure(go.Pie(
+            labels=list(platforms),
+            marker_colors=[colors[i % len(colors)] for i in range(len(platforms))]
+        ))
+        fig.update_layout(title="Répartition par Plateforme", height=400)
+        return fig
+    
     def display_france_info_special(self):
         """Section spéciale pour France Info TV"""
         st.markdown("---")
         st.markdown("### 📰 **FRANCE INFO TV - SPÉCIAL INFO CONTINUE**")
         
-        france_info_data = self.data_manager.channels_data['France Info']
-        
         col1, col2, col3 = st.columns([2, 1, 1])
         
         with col1:
-            st.markdown(f"""
-            <div style="background: linear-gradient(135deg, #FF6B00, #FF8C00); color: white; padding: 1.5rem; border-radius: 10px;">
-                <h3>🎙️ {france_info_data['program']}</h3>
-                <h2>{france_info_data['viewers']:,} téléspectateurs</h2>
-                <p>📊 {france_info_data['share']}% de part d'audience • {france_info_data['change']} vs dernière heure</p>
-            </div>
-            """.replace(',', ' '), unsafe_allow_html=True)
+            self.live_fragment('france_info', LIVE_REFRESH, self.display_france_info_card)
         
         with col2:
-            st.metric("Audience mobile", "58%", "+5%")
-            st.metric("Durée moyenne", "22 min", "+3 min")
+            self.live_fragment('france_info_averages', CHART_REFRESH, self.display_france_info_averages)
         
         with col3:
-            st.metric("Alertes envoyées", "48K", "+12%")
-            st.metric("Social mentions", "3.2K", "+28%")
+            self.live_fragment('france_info_ranking', CHART_REFRESH, self.display_france_info_ranking)
+    
+    def display_france_info_averages(self):
+        """Moyennes glissantes de France Info, lues dans les agrégats"""
+        aggregates = self.data_manager.aggregates
+        recent = aggregates.get('mean 5 min', 'France Info')
+        hourly = aggregates.get('mean 1 h', 'France Info')
+        st.metric("Moyenne 5 min", f"{recent:,.0f}".replace(',', ' '),
+                  f"{(recent / max(hourly, 1) - 1) * 100:+.1f}% vs 1 h")
+        st.metric("Moyenne 1 h", f"{hourly:,.0f}".replace(',', ' '),
+                  f"{aggregates.get('share', 'France Info'):.1f}% du groupe", delta_color='off')
+    
+    def display_france_info_ranking(self):
+        """Pic du jour et rang de France Info parmi les chaînes du groupe"""
+        aggregates = self.data_manager.aggregates
+        st.metric("Pic du jour", f"{aggregates.get('max jour', 'France Info'):,.0f}".replace(',', ' '),
+                  f"min {aggregates.get('min jour', 'France Info'):,.0f}".replace(',', ' '), delta_color='off')
+        st.metric("Rang", f"{aggregates.rank('France Info')}e / {len(aggregates.order)}")
+    
+    def display_france_info_card(self):
+        """Carte d'audience en direct de France Info"""
+        st.markdown(self.france_info_card(), unsafe_allow_html=True)
+    
+    def france_info_card(self):
+        """Carte partagée de France Info
+        
+        Reconstruite à chaque instantané : l'écart à la moyenne sur 1 h bouge à chaque pas,
+        même quand l'audience de France Info ne change pas.
+        """
+        return self.shared_markup('france_info', lambda diff: ['France Info'], self.build_france_info_card)['France Info']
+    
+    def build_france_info_card(self, channel):
+        """Carte HTML de France Info"""
+        france_info_data = self.data_manager.channels.record(channel)
+        hourly = self.data_manager.aggregates.get('mean 1 h', channel)
+        vs_hour = (france_info_data['viewers'] / max(hourly, 1) - 1) * 100
+        return f"""
+        <div style="background: linear-gradient(135deg, #FF6B00, #FF8C00); color: white; padding: 1.5rem; border-radius: 10px;">
+            <h3>🎙️ {france_info_data['program']}</h3>
+            <h2>{france_info_data['viewers']:,} téléspectateurs</h2>
+            <p>📊 {france_info_data['share']:.1f}% de part d'audience • {vs_hour:+.1f}% vs dernière heure</p>
+        </div>
+        """.replace(',', ' ')
+    
+    def live_fragment(self, section, cadence, render):
+        """Rend `render` dans un fragment rafraîchi seul toutes les `cadence` secondes
+        
+        Chaque exécution du fragment relit le dernier instantané publié ; le reste de
+        la page n'est pas réexécuté. Le conteneur dédié donne à chaque fragment un
+        identifiant distinct.
+        """
+        @st.fragment(run_every=cadence)
+        def refresh():
+            self.data_manager = self.store.snapshot()
+            metrics = self.store.metrics
+            metrics.observe('snapshot_age_seconds', (datetime.now() - self.data_manager.current_time).total_seconds())
+            with metrics.section(section):
+                render()
+        
+        with st.container():
+            refresh()
     
     def run_dashboard(self):
-        """Exécute le dashboard complet"""
-        # Mise à jour des données
-        self.data_manager.update_live_data()
+        """Exécute le dashboard complet
+        
+        Les parties statiques ne sont rendues qu'à l'exécution complète du script ;
+        les parties vivantes sont des fragments, chacun à sa propre cadence.
+        """
+        metrics = self.store.metrics
+        render_started = time.perf_counter()
+        
+        # Lecture du dernier instantané publié par le cadenceur
+        self.data_manager = self.store.snapshot()
+        
+        # Cadence des graphiques, réglée par le curseur en bas de page
+        refresh_rate = st.session_state.get('refresh_rate', CHART_REFRESH)
         
         # Affichage des composants
-        self.display_header()
-        self.display_global_metrics()
-        self.display_channels_grid()
-        self.create_live_charts()
+        with metrics.section('header'):
+            self.display_header()
+        self.live_fragment('global_metrics', LIVE_REFRESH, self.display_global_metrics)
+        self.live_fragment('channels_grid', LIVE_REFRESH, self.display_channels_grid)
+        self.create_live_charts(refresh_rate)
         self.display_france_info_special()
         
         # Contrôles de rafraîchissement
@@ -560,7 +3121,7 @@ class AllChannelsDashboard:
         col1, col2, col3 = st.columns([1, 1, 2])
         
         with col1:
-            refresh_rate = st.slider("Rafraîchissement (s)", 5, 60, 15)
+            st.slider("Rafraîchissement graphiques (s)", 5, 60, CHART_REFRESH, key='refresh_rate')
         
         with col2:
             if st.button("🔄 Actualiser maintenant"):
@@ -573,11 +3134,62 @@ class AllChannelsDashboard:
             </div>
             """, unsafe_allow_html=True)
         
-        # Auto-rafraîchissement
-        time.sleep(refresh_rate)
-        st.rerun()
+        metrics.observe('render_seconds', time.perf_counter() - render_started, 'run_dashboard')
+        
+        # Panneau d'instrumentation, sur demande (?admin=1)
+        if st.query_params.get('admin') == '1':
+            with st.sidebar:
+                self.live_fragment('instrumentation', refresh_rate, self.display_instrumentation_panel)
+    
+    def display_instrumentation_panel(self):
+        """Percentiles glissants des sections de rendu et du cadencement, dans la barre latérale"""
+        with st.expander("⏱️ Instrumentation", expanded=True):
+            st.caption("Durées en secondes, allocations en blocs mémoire ; fenêtre glissante")
+            st.dataframe(self.store.metrics.summary(), hide_index=True)
+            st.caption("Cache de rendus partagé")
+            st.dataframe([self.renders.stats()], hide_index=True)
+            st.download_button("Export Prometheus", self.store.metrics.to_prometheus(),
+                               file_name="francetv_metrics.prom", mime="text/plain")
+
+def parse_args(argv=None):
+    """Options passées après `--` : streamlit run Dash.py -- --replay soiree.csv --speed 10"""
+    parser = argparse.ArgumentParser(description="Dashboard France Télévisions")
+    parser.add_argument('--replay', help="Fichier d'audiences à rejouer (CSV, JSONL ou Parquet)")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Vitesse de relecture (1 = temps réel, 0 = au plus vite)")
+    parser.add_argument('--metrics-file', help="Fichier d'export Prometheus, réécrit à chaque pas")
+    parser.add_argument('--produce', metavar='SEGMENT',
+                        help="Lance seulement le producteur, qui publie dans ce fichier (ex. /dev/shm/francetv)")
+    parser.add_argument('--shared', metavar='SEGMENT', help="Affiche les données publiées par un producteur")
+    parser.add_argument('--log-dir', help="Répertoire du journal binaire des audiences (un segment par jour)")
+    parser.add_argument('--ingest', metavar='ADRESSE',
+                        help="Reçoit les flux d'audience sur hôte:port ou sur une socket Unix (chemin)")
+    parser.add_argument('--overflow', choices=INGEST_OVERFLOW_POLICIES, default='block',
+                        help="File d'ingestion pleine : ralentir les flux ou écarter des mesures")
+    parser.add_argument('--fake-feeds', metavar='ADRESSE',
+                        help="Lance seulement le générateur de flux factices vers cette adresse")
+    parser.add_argument('--rate', type=float, default=5000, help="Mesures par seconde des flux factices")
+    parser.add_argument('--duration', type=float, help="Durée d'émission des flux factices (secondes)")
+    parser.add_argument('--seed', type=int, help="Simulation reproductible à partir de cette graine")
+    parser.add_argument('--start', type=datetime.fromisoformat, default=SIMULATION_START,
+                        help="Début de l'horloge simulée avec --seed (ISO 8601, ex. 2025-01-06T19:00)")
+    parser.add_argument('--regional-grid', action='store_true',
+                        help="Ajoute les déclinaisons régionales France 3, les stations La 1ère et les chaînes FAST")
+    return parser.parse_args(argv)
 
 # Lancement du dashboard
 if __name__ == "__main__":
-    dashboard = AllChannelsDashboard()
-    dashboard.run_dashboard()
\ No newline at end of file
+    args = parse_args()
+    if args.fake_feeds:
+        sent, elapsed = asyncio.run(run_fake_feeds(args.fake_feeds, args.rate, args.duration))
+        print(json.dumps({'sent': sent, 'seconds': elapsed, 'rate': sent / elapsed}), flush=True)
+    elif args.produce:
+        run_producer(args.produce, args.replay, args.speed, args.metrics_file, log_dir=args.log_dir,
+                     ingest=args.ingest, overflow=args.overflow, seed=args.seed, start=args.start,
+                     regional_grid=args.regional_grid)
+    else:
+        dashboard = AllChannelsDashboard(
+            get_shared_store(args.replay, args.speed, args.metrics_file, args.shared, args.log_dir,
+                             args.ingest, args.overflow, args.seed, args.start, args.regional_grid)
+        )
+        dashboard.run_dashboard()
\ No newline at end of file
@@ -0,0 +1,428 @@
+# bench.py
+"""Banc de mesure sans navigateur des chemins de simulation et de rendu du dashboard
+
+    python bench.py --output bench_results.json
+    python bench.py --quick --compare bench_results.json
+
+Chaque mesure est répétée et résumée en percentiles (µs) dans un fichier JSON, pour
+comparer deux commits entre eux.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+_PROCESS_STARTED = time.perf_counter()
+
+import numpy as np
+import plotly.io
+import plotly.tools
+import streamlit
+
+# Hors serveur, le premier appel streamlit inspecte la pile d'appels pour avertir de
+# l'exécution directe (~40 ms) ; le serveur ne le fait pas : payé ici, hors mesure de Dash
+streamlit.empty()
+
+_STREAMLIT_IMPORTED = time.perf_counter()
+
+import Dash
+
+_DASH_IMPORTED = time.perf_counter()
+
+CHANNEL_COUNTS = (7, 100, 1000)
+HISTORY_LENGTHS = (60, 600, 3600, 21600, 86400)
+# Historique utilisé pour les mesures à nombre de chaînes variable
+CHANNEL_BENCH_HISTORY = 3600
+# Démarrages à froid mesurés, chacun dans un nouveau processus
+STARTUP_RUNS = 10
+# Budget de démarrage : du lancement du script (streamlit déjà importé par le serveur)
+# à la fin du premier rendu
+STARTUP_BUDGET_SECONDS = 0.25
+# Sessions simultanées affichant la même vue, et pas mesurés pour chacune
+SESSION_COUNTS = (5, 50, 500)
+SESSION_TICKS = 5
+# Simulation découpée : chaînes, pas (une heure à 5 s) et nombre de morceaux
+SHARD_CHANNELS = 1000
+SHARD_STEPS = 720
+SHARD_COUNT = 4
+# Débits des flux factices (mesures par seconde) et durée d'émission de chaque mesure d'ingestion
+INGEST_RATES = (5000, 50000)
+INGEST_SECONDS = 5
+# Intervalle entre deux pas pendant l'ingestion (plus court que le cadenceur, pour plus d'échantillons)
+INGEST_TICK = 0.5
+
+class _Block:
+    """Colonne, onglet ou expander factice utilisable comme gestionnaire de contexte"""
+    def __init__(self, open=True):
+        self.open = open
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(StubStreamlit.current, name)
+
+class StubStreamlit:
+    """Remplace le module streamlit : aucun rendu, mais les figures sont sérialisées en JSON
+    comme le ferait st.plotly_chart"""
+    current = None
+
+    def __init__(self):
+        self.session_state = {}
+        self.query_params = {}
+        self.sidebar = _Block()
+        self.payload_bytes = 0
+        StubStreamlit.current = self
+
+    def columns(self, spec, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        return [_Block() for _ in range(count)]
+
+    def tabs(self, labels, **kwargs):
+        # Comme st.tabs(on_change='rerun') : seul le premier onglet est ouvert
+        return [_Block(open=i == 0) for i in range(len(labels))]
+
+    def expander(self, *args, **kwargs):
+        return _Block()
+
+    def container(self, *args, **kwargs):
+        return _Block()
+
+    def plotly_chart(self, fig, **kwargs):
+        # Même sérialisation que st.plotly_chart
+        figure = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+        self.payload_bytes += len(plotly.io.to_json(figure, validate=False))
+
+    def slider(self, label, min_value, max_value, value, **kwargs):
+        return value
+
+    def radio(self, label, options, index=0, **kwargs):
+        return list(options)[index]
+
+    def button(self, *args, **kwargs):
+        return False
+
+    def fragment(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    def get_option(self, key):
+        # Configuration réelle (.streamlit/config.toml du dépôt), comme en production
+        return streamlit.config.get_option(key)
+
+    def __getattr__(self, name):
+        # markdown, metric, image, subheader, rerun... : sans effet
+        return lambda *args, **kwargs: None
+
+def git_revision():
+    """Commit courant, pour rattacher les résultats à une version du code"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(samples):
+    """Résume des durées en microsecondes"""
+    samples = np.asarray(samples, dtype=np.float64)
+    p50, p90, p95, p99 = np.percentile(samples, [50, 90, 95, 99])
+    return {
+        'n': len(samples), 'mean_us': float(samples.mean()), 'min_us': float(samples.min()),
+        'p50_us': float(p50), 'p90_us': float(p90), 'p95_us': float(p95), 'p99_us': float(p99),
+        'max_us': float(samples.max())
+    }
+
+def measure(func, repeat, warmup=3, setup=None):
+    """Exécute `func` `repeat` fois et résume les durées en microsecondes
+    
+    `setup`, s'il est donné, est appelé avant chaque exécution, hors mesure.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        func()
+        samples[i] = time.perf_counter_ns() - start
+    return summarize(samples / 1000)
+
+def synthetic_channels(count):
+    """Chaînes fictives ajoutées aux 7 chaînes nationales pour atteindre `count` chaînes"""
+    return {
+        f'Chaîne test {i}': {
+            'viewers': 50000 + 1000 * (i % 50), 'share': 0.3, 'program': 'Programme test',
+            'trend': 'stable', 'change': '+0.0%', 'category': 'Test', 'color': '#0055A4',
+            'peak_today': 100000
+        }
+        for i in range(max(count - 7, 0))
+    }
+
+def make_model(channels, history_length, seed=0, extra_channels=None):
+    """Modèle de `channels` chaînes dont l'historique contient `history_length` points
+    
+    `extra_channels` remplace les chaînes fictives (grille régionale, par exemple).
+    """
+    if extra_channels is None:
+        extra_channels = synthetic_channels(channels)
+    model = Dash.FranceTVAllChannels(
+        history_points=max(history_length, 60), extra_channels=extra_channels, seed=seed
+    )
+    if history_length > len(model.data_history):
+        timestamps, rows = Dash.generate_backfill(
+            model.engine.viewers, model.now(), history_length - len(model.data_history),
+            interval=timedelta(seconds=1), rng=np.random.default_rng(seed)
+        )
+        model.data_history.extend(timestamps, rows)
+    return model
+
+def make_dashboard(model):
+    """Dashboard branché sur un magasin sans cadenceur, rendu par le stub streamlit"""
+    store = Dash.SharedDataStore(model)
+    store.tick()
+    return Dash.AllChannelsDashboard(store)
+
+def tick_models():
+    """Modèles de bench_ticks : grilles fictives de CHANNEL_COUNTS chaînes, puis la grille régionale réelle"""
+    for channels in CHANNEL_COUNTS:
+        yield f'channels={channels}', make_model(channels, CHANNEL_BENCH_HISTORY)
+    grid = Dash.build_regional_grid()
+    yield f'regional_grid/channels={7 + len(grid)}', make_model(7 + len(grid), CHANNEL_BENCH_HISTORY,
+                                                                 extra_channels=grid)
+
+def bench_ticks(results, repeat):
+    """Pas de données complet et ses étapes, selon le nombre de chaînes"""
+    for label, model in tick_models():
+        results[f'tick/update_live_data/{label}'] = measure(model.update_live_data, repeat)
+        results[f'tick/update_history_data/{label}'] = measure(model.update_history_data, repeat)
+        results[f'tick/rotate_programs/{label}'] = measure(model.rotate_programs, repeat)
+        results[f'tick/channel_table/{label}'] = measure(model.channel_table, repeat)
+
+def bench_history(results, repeat):
+    """Pas de données et instantané selon la longueur de l'historique (7 chaînes)"""
+    for length in HISTORY_LENGTHS:
+        model = make_model(7, length)
+        store = Dash.SharedDataStore(model)
+        results[f'history/update_live_data/points={length}'] = measure(model.update_live_data, repeat)
+        results[f'history/store_tick/points={length}'] = measure(store.tick, repeat)
+
+    # Sélection du niveau et réduction, sur une semaine d'historique par minute
+    model = make_model(7, 60)
+    model.backfill_history(7, seed=0)
+    window = model.data_history.freeze()
+    for label, seconds in Dash.HISTORY_WINDOWS.items():
+        results[f'history/downsampled/window={label}'] = measure(
+            lambda seconds=seconds: window.downsampled('France 2', seconds), repeat)
+
+def bench_charts(results, repeat):
+    """Construction et sérialisation JSON de chaque graphique
+    
+    `render/*` : chaque mesure porte sur un nouvel instantané, donc une construction
+    (manque du cache de rendus) ; `render_cached/*` : même instantané, rendu déjà en cache.
+    """
+    for channels in CHANNEL_COUNTS:
+        dashboard = make_dashboard(make_model(channels, CHANNEL_BENCH_HISTORY))
+        
+        def new_version():
+            dashboard.store.tick()
+            dashboard.data_manager = dashboard.store.snapshot()
+        
+        for name in ('create_evolution_chart', 'create_comparison_chart', 'create_geo_chart',
+                     'create_platforms_chart', 'display_channels_grid'):
+            render = getattr(dashboard, name)
+            results[f'render/{name}/channels={channels}'] = measure(render, repeat, setup=new_version)
+            results[f'render_cached/{name}/channels={channels}'] = measure(render, repeat)
+
+        stub = StubStreamlit.current
+        stub.payload_bytes = 0
+        dashboard.create_live_charts()
+        results[f'render/figure_payload_bytes/channels={channels}'] = {'bytes': stub.payload_bytes}
+
+def bench_run_dashboard(results, repeat):
+    """Passe complète de run_dashboard, appels streamlit neutralisés"""
+    for channels in CHANNEL_COUNTS:
+        model = make_model(channels, CHANNEL_BENCH_HISTORY)
+        dashboard = make_dashboard(model)
+
+        def full_pass():
+            dashboard.store.tick()
+            dashboard.run_dashboard()
+        results[f'render/run_dashboard/channels={channels}'] = measure(full_pass, repeat)
+
+def bench_sessions(results, ticks):
+    """Rendu complet par N sessions du même instantané, à chaque pas (100 chaînes)
+    
+    La première session construit chaque section dans le cache de rendus partagé, les
+    suivantes la réutilisent : le coût par session doit rester stable quand N augmente.
+    """
+    for sessions in SESSION_COUNTS:
+        model = make_model(100, CHANNEL_BENCH_HISTORY)
+        store = Dash.SharedDataStore(model)
+        first, others, totals = [], [], []
+        for _ in range(ticks):
+            store.tick()
+            tick_started = time.perf_counter_ns()
+            for session in range(sessions):
+                started = time.perf_counter_ns()
+                Dash.AllChannelsDashboard(store).run_dashboard()
+                (others if session else first).append((time.perf_counter_ns() - started) / 1000)
+            totals.append((time.perf_counter_ns() - tick_started) / 1000)
+        results[f'sessions/first_session/sessions={sessions}'] = summarize(first)
+        results[f'sessions/other_sessions/sessions={sessions}'] = summarize(others)
+        results[f'sessions/tick_total/sessions={sessions}'] = summarize(totals)
+
+def bench_simulation(results, repeat):
+    """Simulation déterministe en un fil, découpée sur des threads puis sur des processus
+    
+    Chaque variante doit redonner exactement les audiences de la simulation en un fil.
+    """
+    viewers = 50000 + 1000 * (np.arange(SHARD_CHANNELS) % 50)
+    volatility = Dash.VOLATILITY_BY_HOUR[np.arange(SHARD_STEPS) * 24 // SHARD_STEPS]
+    reference = Dash.simulate_channels(0, viewers, volatility)
+    runs = {
+        'single': lambda: Dash.simulate_channels(0, viewers, volatility),
+        'threads': lambda: Dash.simulate_sharded(0, viewers, volatility, SHARD_COUNT)
+    }
+    with ProcessPoolExecutor(SHARD_COUNT) as pool:
+        runs['processes'] = lambda: Dash.simulate_sharded(0, viewers, volatility, SHARD_COUNT, pool)
+        for name, run in runs.items():
+            results[f'simulation/{name}/channels={SHARD_CHANNELS}'] = measure(run, repeat, warmup=1)
+            results[f'simulation/{name}/identical'] = {'identical': bool(np.array_equal(run(), reference))}
+
+def startup_child():
+    """Démarrage à froid dans ce processus : durées de chaque phase en secondes, sur stdout"""
+    phases = {
+        'import_streamlit': _STREAMLIT_IMPORTED - _PROCESS_STARTED,
+        'import_dash': _DASH_IMPORTED - _STREAMLIT_IMPORTED
+    }
+    Dash.st = StubStreamlit()
+    started = time.perf_counter()
+    store = Dash.SharedDataStore(Dash.FranceTVAllChannels())
+    store.tick()
+    phases['model'] = time.perf_counter() - started
+    started = time.perf_counter()
+    Dash.AllChannelsDashboard(store).run_dashboard()
+    phases['first_render'] = time.perf_counter() - started
+    print(json.dumps(phases))
+
+def bench_startup(results, runs):
+    """Démarrage à froid, du lancement du script à la fin du premier rendu, comparé au budget"""
+    samples = {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, '--startup-child'],
+                                capture_output=True, text=True, check=True).stdout
+        phases = json.loads(output.strip().splitlines()[-1])
+        phases['to_first_render'] = phases['import_dash'] + phases['model'] + phases['first_render']
+        for phase, seconds in phases.items():
+            samples.setdefault(phase, []).append(seconds * 1e6)
+    for phase, values in samples.items():
+        results[f'startup/{phase}'] = summarize(values)
+    
+    p95 = results['startup/to_first_render']['p95_us'] / 1e6
+    results['startup/budget'] = {'budget_s': STARTUP_BUDGET_SECONDS, 'p95_s': p95,
+                                 'within_budget': p95 <= STARTUP_BUDGET_SECONDS}
+    print(f"startup: p95 {p95:.3f}s jusqu'au premier rendu (budget {STARTUP_BUDGET_SECONDS}s)",
+          file=sys.stderr)
+
+def bench_ingest(results, seconds):
+    """Ingestion de flux factices émis par un processus séparé, à plusieurs débits
+    
+    Vérifie que tout ce qui est envoyé est reçu (politique 'block' : aucune perte
+    possible, seulement du ralentissement) et mesure la prise de lot à chaque pas.
+    """
+    for rate in INGEST_RATES:
+        source = Dash.FeedIngestSource('127.0.0.1:0').start()
+        store = Dash.SharedDataStore(Dash.FranceTVAllChannels(source=source, rng=np.random.default_rng(0)))
+        feeds = subprocess.Popen([sys.executable, Dash.__file__, '--fake-feeds', source.bound_address,
+                                  '--rate', str(rate), '--duration', str(seconds)],
+                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        samples = []
+        while feeds.poll() is None:
+            time.sleep(INGEST_TICK)
+            started = time.perf_counter_ns()
+            store.tick()
+            samples.append((time.perf_counter_ns() - started) / 1000)
+        time.sleep(INGEST_TICK)
+        store.tick()
+        source.close()
+        
+        sent = json.loads(feeds.stdout.read().strip().splitlines()[-1])
+        counters = source.counters
+        results[f'ingest/store_tick/rate={rate}'] = summarize(samples)
+        results[f'ingest/throughput/rate={rate}'] = {
+            'sent': sent['sent'], 'sent_per_second': sent['rate'], 'received': counters['received'],
+            'dropped': counters['dropped'], 'late': counters['late'],
+            'kept_up': counters['received'] == sent['sent'] and sent['rate'] >= 0.95 * rate
+        }
+
+def compare(results, baseline_path):
+    """Affiche le rapport p50 courant / p50 de référence pour chaque mesure commune"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    for name, stats in results.items():
+        if 'p50_us' in stats and 'p50_us' in baseline.get(name, {}):
+            ratio = stats['p50_us'] / baseline[name]['p50_us']
+            flag = '  <-- régression' if ratio > 1.2 else ''
+            print(f"{name:<60} {ratio:6.2f}x{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='bench_results.json', help="Fichier JSON de résultats")
+    parser.add_argument('--repeat', type=int, default=200, help="Répétitions par mesure")
+    parser.add_argument('--quick', action='store_true', help="Moins de répétitions, pour un contrôle rapide")
+    parser.add_argument('--compare', help="Résultats de référence à comparer")
+    parser.add_argument('--startup-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.startup_child:
+        return startup_child()
+    repeat = 20 if args.quick else args.repeat
+
+    results = {}
+    started = time.perf_counter()
+    bench_startup(results, 3 if args.quick else STARTUP_RUNS)
+    print(f"bench_startup: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    Dash.st = StubStreamlit()
+    for section in (bench_ticks, bench_history, bench_charts, bench_run_dashboard):
+        started = time.perf_counter()
+        section(results, repeat)
+        print(f"{section.__name__}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    
+    started = time.perf_counter()
+    bench_simulation(results, 3 if args.quick else 10)
+    print(f"bench_simulation: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    
+    started = time.perf_counter()
+    bench_sessions(results, 2 if args.quick else SESSION_TICKS)
+    print(f"bench_sessions: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    
+    started = time.perf_counter()
+    bench_ingest(results, 2 if args.quick else INGEST_SECONDS)
+    print(f"bench_ingest: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    report = {
+        'revision': git_revision(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'repeat': repeat,
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        compare(results, args.compare)
+    return report
+
+if __name__ == "__main__":
+    main()